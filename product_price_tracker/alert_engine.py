@@ -0,0 +1,228 @@
+# alert_engine.py
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+import argparse
+import json
+import os
+import threading
+
+# Threshold alerts are evaluated by the price store as each observation is
+# written: one primary-key lookup and one upsert per row, never a history scan.
+#
+# A product alerts when its price first drops below its threshold. While it
+# stays below, it alerts again only on a further drop, and never more often
+# than COOLDOWN per product; climbing back to the threshold re-arms it.
+COOLDOWN = 6 * 60 * 60
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Sinks beyond the console and log file are configured from the environment:
+#   ALERT_WEBHOOK_URL   e.g. http://127.0.0.1:8765/ (see `python alert_engine.py webhook`)
+#   ALERT_SMTP_HOST     e.g. localhost, with ALERT_SMTP_PORT (1025) pointing at a local
+#                       debug server such as `python -m aiosmtpd -n -l localhost:1025`
+#   ALERT_EMAIL_TO      comma-separated recipients, ALERT_EMAIL_FROM the sender
+ALERT_LOG_FILE = 'alerts.log'
+WEBHOOK_TIMEOUT = 5
+SMTP_PORT = 1025
+
+SCHEMA = """
+-- Per-product alert state: O(1) to check on every write
+CREATE TABLE IF NOT EXISTS alert_state (
+    product_id    INTEGER PRIMARY KEY REFERENCES products(id),
+    triggered     INTEGER NOT NULL DEFAULT 0,   -- below threshold since the last alert
+    last_price    REAL,                         -- price of the last alert
+    last_alert_at TEXT
+);
+
+CREATE TABLE IF NOT EXISTS alerts (
+    id         INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    timestamp  TEXT NOT NULL,
+    price      REAL,
+    threshold  REAL
+);
+
+CREATE INDEX IF NOT EXISTS idx_alerts_time ON alerts(timestamp, id);
+"""
+
+
+class ConsoleSink:
+    """The "Deal Alert!" line the scrapers used to print"""
+
+    def send(self, alert):
+        print(f" Deal Alert! '{alert['name']}' is now ₹{alert['price']} (Below ₹{alert['threshold']})")
+
+
+class LogSink:
+    """Appends one JSON line per alert"""
+
+    def __init__(self, path=ALERT_LOG_FILE):
+        self.path = path
+
+    def send(self, alert):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(alert, ensure_ascii=False) + '\n')
+
+
+class WebhookSink:
+    """POSTs each alert as JSON"""
+
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, alert):
+        import urllib.request
+
+        request = urllib.request.Request(
+            self.url, data=json.dumps(alert).encode('utf-8'),
+            headers={'Content-Type': 'application/json'}, method='POST'
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class SmtpSink:
+    """Emails each alert; meant for a local debug SMTP server, so no TLS or login"""
+
+    def __init__(self, host, recipients, port=SMTP_PORT, sender='price-tracker@localhost'):
+        self.host = host
+        self.port = port
+        self.recipients = list(recipients)
+        self.sender = sender
+
+    def send(self, alert):
+        from email.message import EmailMessage
+        import smtplib
+
+        message = EmailMessage()
+        message['Subject'] = f"Price drop: {alert['name']} is now ₹{alert['price']}"
+        message['From'] = self.sender
+        message['To'] = ', '.join(self.recipients)
+        message.set_content(
+            f"{alert['name']} ({alert['site']}) dropped to ₹{alert['price']}, "
+            f"below your threshold of ₹{alert['threshold']}.\n\n{alert['url']}\n"
+        )
+        with smtplib.SMTP(self.host, self.port, timeout=WEBHOOK_TIMEOUT) as smtp:
+            smtp.send_message(message)
+
+
+def default_sinks():
+    sinks = [ConsoleSink(), LogSink()]
+    if os.environ.get('ALERT_WEBHOOK_URL'):
+        sinks.append(WebhookSink(os.environ['ALERT_WEBHOOK_URL']))
+    if os.environ.get('ALERT_SMTP_HOST') and os.environ.get('ALERT_EMAIL_TO'):
+        sinks.append(SmtpSink(
+            os.environ['ALERT_SMTP_HOST'],
+            [address.strip() for address in os.environ['ALERT_EMAIL_TO'].split(',')],
+            port=int(os.environ.get('ALERT_SMTP_PORT', SMTP_PORT)),
+            sender=os.environ.get('ALERT_EMAIL_FROM', 'price-tracker@localhost'),
+        ))
+    return sinks
+
+
+class AlertEngine:
+    """Decides at write time whether an observation alerts, and fans alerts out to sinks.
+
+    `evaluate` runs inside the store's write transaction so alert state commits
+    with the observation; `dispatch` runs after the commit and hands delivery
+    to a background thread, so slow sinks never hold the write lock."""
+
+    def __init__(self, sinks=None, cooldown=COOLDOWN):
+        self.sinks = default_sinks() if sinks is None else list(sinks)
+        self.cooldown = cooldown
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def evaluate(self, conn, product_id, timestamp, price, threshold):
+        """Update product_id's alert state for one observation; the alert dict if it fires"""
+        if price is None or price <= 0 or not threshold:
+            return None   # no price is a failed scrape, not a deal
+
+        state = conn.execute(
+            "SELECT triggered, last_price, last_alert_at FROM alert_state WHERE product_id = ?",
+            (product_id,)
+        ).fetchone()
+
+        if price >= threshold:
+            if state and state['triggered']:
+                conn.execute("UPDATE alert_state SET triggered = 0 WHERE product_id = ?", (product_id,))
+            return None
+
+        if state and state['triggered'] and price >= state['last_price']:
+            return None
+        if state and state['last_alert_at'] and not self._cooled_down(state['last_alert_at'], timestamp):
+            return None
+
+        conn.execute(
+            """
+            INSERT INTO alert_state (product_id, triggered, last_price, last_alert_at)
+            VALUES (?, 1, ?, ?)
+            ON CONFLICT(product_id) DO UPDATE SET
+                triggered = 1, last_price = excluded.last_price, last_alert_at = excluded.last_alert_at
+            """,
+            (product_id, price, timestamp)
+        )
+        cursor = conn.execute(
+            "INSERT INTO alerts (product_id, timestamp, price, threshold) VALUES (?, ?, ?, ?)",
+            (product_id, timestamp, price, threshold)
+        )
+        product = conn.execute(
+            "SELECT product_key, site, name, brand, url FROM products WHERE id = ?", (product_id,)
+        ).fetchone()
+        return dict(product, id=cursor.lastrowid, timestamp=timestamp, price=price, threshold=threshold)
+
+    def _cooled_down(self, last_alert_at, timestamp):
+        try:
+            elapsed = (datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+                       - datetime.strptime(last_alert_at, TIMESTAMP_FORMAT))
+        except (TypeError, ValueError):
+            return True
+        return elapsed.total_seconds() >= self.cooldown
+
+    def dispatch(self, alerts):
+        """Deliver committed alerts to every sink, in order, off the caller's thread"""
+        if not alerts or not self.sinks:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="alerts")
+        return self._executor.submit(self.deliver, alerts)
+
+    def deliver(self, alerts):
+        for alert in alerts:
+            for sink in self.sinks:
+                try:
+                    sink.send(alert)
+                except Exception as e:
+                    print(f"Alert Delivery Error ({type(sink).__name__}): {e}")
+
+
+def serve_webhook(port):
+    """Local stand-in for a real webhook receiver: prints every alert POSTed to it"""
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            print(json.dumps(json.loads(body or b'{}'), ensure_ascii=False))
+            self.send_response(204)
+            self.end_headers()
+
+        def log_message(self, format, *args):
+            pass
+
+    print(f"Listening for alerts on http://127.0.0.1:{port}/")
+    HTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Price alert tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    webhook = commands.add_parser("webhook", help="run a local webhook receiver that prints alerts")
+    webhook.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.command == "webhook":
+        serve_webhook(args.port)
@@ -1,32 +1,59 @@
-from flask import Flask, render_template,abort, request, redirect, url_for, flash, jsonify
-from scraper import search_all_products, ProductScraper # Updated import
-import pandas as pd
 import os
-from product_scraper import track_product, get_amazon_data
-from wishlist_analysis import generate_wishlist_insights
+
+# Charts are only ever rendered to files; pick the non-interactive backend
+# before anything can import matplotlib
+os.environ.setdefault('MPLBACKEND', 'Agg')
+
+from flask import Flask, render_template,abort, request, redirect, url_for, flash, jsonify, Response, stream_with_context
+from refresh_scheduler import PriceRefreshScheduler
+from jobs import JobQueue
+from price_store import get_store, PAGE_SIZE
+from chart_data import ChartDataService, CHARTS
+from datetime import date, timedelta
 import csv
-from bs4 import BeautifulSoup
-import requests
-import re
-import matplotlib.pyplot as plt
-import plotly.graph_objs as go
-import plotly.offline as pyo
 import json
 import threading
-import time
+
+# Heavy dependencies (pandas, matplotlib, Selenium, requests/bs4) are imported
+# inside the routes that use them so worker processes start quickly.
 
 app = Flask(__name__)
 app.secret_key = 'secret_key_123'
 
 # File paths
-DATA_FILE = 'price_data.csv'
 WISHLIST_FILE = 'wishlist.csv'
 
+# Price observations live in SQLite; price_data.csv is migrated on first start
+store = get_store()
+chart_service = ChartDataService(store)
+
+# Re-scrapes tracked products in the background so history grows on its own.
+# PRICE_REFRESH=0 turns it off, e.g. in all but one of several gunicorn workers.
+refresher = PriceRefreshScheduler(store)
+refresher_lock = threading.Lock()
+refresher_checked = False
+
+@app.before_request
+def start_refresher():
+    # Started by the first request a process serves, never at import, so scripts,
+    # the flask CLI and the debug reloader's watching parent don't scrape
+    global refresher_checked
+    if refresher_checked:
+        return
+    with refresher_lock:
+        if refresher_checked:
+            return
+        refresher_checked = True
+    if os.environ.get('PRICE_REFRESH', '1') != '0':
+        refresher.start()
+
+# Scrapes requested through /add_product run here instead of on the request thread
+tracking_jobs = JobQueue()
+wishlist_lock = threading.Lock()
+
 @app.route('/')
 def home():
-    df = pd.read_csv('price_data.csv')
-    products = df.to_dict(orient='records')
-    return render_template('index.html', products=products)
+    return render_template('index.html')
 
 @app.route('/add_product', methods=['POST'])
 def add_product():
@@ -37,38 +64,52 @@ def add_product():
         flash("Threshold must be a number.", "danger")
         return redirect(url_for('home'))
 
-    track_product(url, threshold)
+    job_id = tracking_jobs.submit(track_and_add_to_wishlist, url, threshold,
+                                  'add_to_wishlist' in request.form)
 
-    if 'add_to_wishlist' in request.form:
-        product_info = scrape_product_details(url)
+    if request.accept_mimetypes.accept_json and not request.accept_mimetypes.accept_html:
+        return jsonify({"job_id": job_id, "status_url": url_for('job_status', job_id=job_id)}), 202
 
-        file_exists = os.path.isfile(WISHLIST_FILE)
-        with open(WISHLIST_FILE, 'a', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            if not file_exists or os.path.getsize(WISHLIST_FILE) == 0:
-                writer.writerow(['user_id', 'item_name', 'category', 'price_threshold', 'set_date', 'last_activity', 'times_visited', 'intent_score'])
-            writer.writerow([
-                "user1",
-                product_info.get('product_name', ''),
-                product_info.get('category', 'Unknown'),
-                threshold,
-                pd.Timestamp.now().date(),
-                pd.Timestamp.now().date(),
-                1,
-                ''
-            ])
-
-    flash("Product scraped successfully!", "success")
+    flash(f"Tracking started (job {job_id}). The product will appear here once it has been scraped.", "success")
     return redirect(url_for('view_products'))
 
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = tracking_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job)
+
 @app.route('/products')
 def view_products():
-    if os.path.exists(DATA_FILE):
-        df = pd.read_csv(DATA_FILE)
-        products = df.to_dict(orient='records')
-    else:
-        products = []
-    return render_template('products.html', products=products)
+    # Rows are fetched page by page from /api/observations
+    return render_template('products.html', sites=store.sites())
+
+# Paginated listings: ?site=&min_price=&max_price=&below_threshold=1&sort=&cursor=&limit=
+@app.route('/api/products')
+def api_products():
+    return list_page(store.list_products, '-updated')
+
+@app.route('/api/observations')
+def api_observations():
+    return list_page(store.list_observations, '-time')
+
+def list_page(lister, default_sort):
+    args = request.args
+    try:
+        items, next_cursor = lister(
+            site=args.get('site') or None,
+            min_price=float(args['min_price']) if args.get('min_price') else None,
+            max_price=float(args['max_price']) if args.get('max_price') else None,
+            below_threshold=args.get('below_threshold', '').lower() in ('1', 'true', 'yes', 'on'),
+            sort=args.get('sort', default_sort),
+            cursor=args.get('cursor') or None,
+            limit=int(args.get('limit', PAGE_SIZE)),
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({"items": items, "count": len(items), "next_cursor": next_cursor})
 
 @app.route('/wishlist', methods=['GET', 'POST'])
 def wishlist():
@@ -82,75 +123,70 @@ def wishlist():
         times_visited = request.form['times_visited']
         intent_score = request.form.get('intent_score', '')
 
-        file_exists = os.path.isfile(WISHLIST_FILE)
-        with open(WISHLIST_FILE, 'a', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            if not file_exists or os.path.getsize(WISHLIST_FILE) == 0:
-                writer.writerow(['user_id', 'item_name', 'category', 'price_threshold', 'set_date', 'last_activity', 'times_visited', 'intent_score'])
-            writer.writerow([
-                user_id, item_name, category, price_threshold,
-                set_date, last_activity, times_visited, intent_score
-            ])
+        append_wishlist_row([
+            user_id, item_name, category, price_threshold,
+            set_date, last_activity, times_visited, intent_score
+        ])
 
         return redirect('/wishlist')
 
     if os.path.exists(WISHLIST_FILE):
-        insights = generate_wishlist_insights(WISHLIST_FILE)
+        from wishlist_analysis import generate_wishlist_insights
+
+        user_id = request.args.get('user_id')
+        insights = generate_wishlist_insights(WISHLIST_FILE, user_id)
         category_summary = insights['category_group']
         price_hist = insights['price_hist']
         intent_counts = insights['intent_counts']
         raw_data = insights['raw_df'].to_dict(orient='records')
+        hist_image = insights['hist_image']
+        pie_image = insights['pie_image']
     else:
         category_summary = []
         price_hist = {}
         intent_counts = {}
         raw_data = []
+        hist_image = pie_image = None
 
     return render_template('wishlist.html',
                            category_summary=category_summary,
                            price_hist=price_hist,
                            intent_counts=intent_counts,
-                           wishlist_data=raw_data)
+                           wishlist_data=raw_data,
+                           hist_image=hist_image,
+                           pie_image=pie_image)
 
 @app.route('/alerts')
 def alerts():
-    alerts = []
-    if os.path.exists(DATA_FILE):
-        df = pd.read_csv(DATA_FILE)
-
-        if 'threshold' in df.columns and 'price' in df.columns:
-            df['price'] = pd.to_numeric(df['price'], errors='coerce')
-            df['threshold'] = pd.to_numeric(df['threshold'], errors='coerce')
-            df.dropna(subset=['price', 'threshold'], inplace=True)
-
-            alerts_df = df[df['price'] < df['threshold']]
-            if alerts_df.empty:
-                flash("No alerts triggered yet. All prices are above thresholds.", "info")
-            alerts = alerts_df.to_dict(orient='records')
-        else:
-            flash("Threshold or price column not found in data. Please update scraper.", "danger")
-    else:
-        flash("No product data found yet. Please add a product first.", "warning")
-
+    # Alerts are raised by the store's alert engine as observations are written
+    alerts = store.recent_alerts(limit=request.args.get('limit', PAGE_SIZE, type=int))
+    if not alerts:
+        flash("No alerts triggered yet. All prices are above thresholds.", "info")
     return render_template('alerts.html', alerts=alerts)
 
 @app.route('/bar_chart')
 def bar_chart():
-    df = pd.read_csv(DATA_FILE)
-    bar_html = plotly_bar_avg_price(df)
-    return render_template('bar_chart.html', bar_html=bar_html)
+    return render_template('bar_chart.html')
 
 @app.route('/all_graphs')
 def all_graphs():
-    df = pd.read_csv(DATA_FILE)
-    box_plot = create_box_plot(df)
-    histogram = create_histogram(df)
-    return render_template('all_graphs.html',
-                           box_plot=box_plot,
-                           histogram=histogram)
+    return render_template('all_graphs.html')
+
+# Chart payloads rendered client-side by Plotly.js; cached until the price store changes
+@app.route('/api/charts/<chart_name>')
+def api_chart(chart_name):
+    if chart_name not in CHARTS:
+        return jsonify({"error": f"Unknown chart '{chart_name}'"}), 404
+
+    payload, etag = chart_service.get(chart_name)
+    response = app.response_class(payload, mimetype='application/json')
+    response.set_etag(etag)
+    return response.make_conditional(request)
 
 @app.route("/search", methods=["GET", "POST"], endpoint='search_products')
 def search_products():
+    from scraper import search_all_products
+
     products = None
     loading = False
     search_params = {}
@@ -195,6 +231,8 @@ def search_products():
 # AJAX endpoint for real-time search
 @app.route("/api/search", methods=["POST"])
 def api_search():
+    from scraper import search_all_products
+
     try:
         data = request.get_json()
         product_name = data.get("product_name", "").strip()
@@ -213,115 +251,84 @@ def api_search():
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
-    
-@app.route('/product', methods=['GET'])
-def product_page():
-    product_url = request.args.get('url') 
-    return render_template('product.html', product_url=product_url)
 
+# Server-Sent Events stream: each product is pushed as soon as a platform parses it
+@app.route("/api/search/stream")
+def api_search_stream():
+    from scraper import stream_all_products
 
-# Utility functions
-def plotly_bar_avg_price(df):
-    df = df.copy()
-    avg_price = df.groupby('name')['price'].mean().reset_index()
-
-    fig = go.Figure([go.Bar(
-        x=avg_price['name'],
-        y=avg_price['price'],
-        marker_color='indigo'
-    )])
-
-    fig.update_layout(
-        title="Average Price per Product",
-        xaxis_title="Product Name",
-        yaxis_title="Average Price (₹)",
-        xaxis_tickangle=-45
-    )
+    product_name = request.args.get("product_name", "").strip()
+    price_range = request.args.get("price_range", "all")
+    if not product_name:
+        return jsonify({"error": "Product name is required"}), 400
 
-    graph_html = pyo.plot(fig, include_plotlyjs=False, output_type='div')
-    return graph_html
-
-def create_box_plot(df):
-    fig = go.Figure()
-
-    for product in df['name'].unique():
-        product_prices = df[df['name'] == product]['price']
-        fig.add_trace(go.Box(
-            y=product_prices,
-            name=product,
-            boxpoints='all',
-            jitter=0.5,
-            whiskerwidth=0.2,
-            marker=dict(size=4),
-            line=dict(width=1)
-        ))
-
-    fig.update_layout(
-        title='Price Range by Product',
-        yaxis_title='Price (₹)',
-        xaxis_title='Product',
-        boxmode='group',
-        showlegend=False,
-        xaxis_tickangle=-45,
-        height=600,
-        margin=dict(l=40, r=40, t=60, b=150)
-    )
+    def events():
+        try:
+            for event, payload in stream_all_products(product_name, price_range):
+                yield f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+        except Exception as e:
+            yield f"event: error\ndata: {json.dumps({'error': str(e)})}\n\n"
 
-    return pyo.plot(fig, output_type='div')
+    response = Response(stream_with_context(events()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
-def create_histogram(df):
-    fig = go.Figure()
+# Per-site page readiness timings collected by the scrapers
+@app.route("/api/metrics/fetch")
+def api_fetch_metrics():
+    from fetcher import get_fetch_metrics
 
-    for product in df['name'].unique():
-        fig.add_trace(go.Histogram(
-            x=df[df['name'] == product]['price'],
-            name=product,
-            opacity=0.6  
-        ))
+    return jsonify(get_fetch_metrics())
 
-    fig.update_layout(
-        title='Price Distribution by Product',
-        xaxis_title='Price (₹)',
-        yaxis_title='Count',
-        barmode='overlay', 
-        height=600
-    )
+@app.route("/api/refresh/status")
+def api_refresh_status():
+    return jsonify(refresher.stats())
+    
+@app.route('/product', methods=['GET'])
+def product_page():
+    product_url = request.args.get('url') 
+    return render_template('product.html', product_url=product_url)
 
-    return pyo.plot(fig, output_type='div')
 
-def scrape_product_details(url):
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
-    }
+# Utility functions
+def append_wishlist_row(row):
+    with wishlist_lock:
+        file_exists = os.path.isfile(WISHLIST_FILE)
+        with open(WISHLIST_FILE, 'a', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            if not file_exists or os.path.getsize(WISHLIST_FILE) == 0:
+                writer.writerow(['user_id', 'item_name', 'category', 'price_threshold', 'set_date', 'last_activity', 'times_visited', 'intent_score'])
+            writer.writerow(row)
 
-    try:
-        response = requests.get(url, headers=headers, timeout=10)
-        soup = BeautifulSoup(response.content, 'html.parser')
+def track_and_add_to_wishlist(url, threshold, add_to_wishlist=False):
+    """Background job for /add_product: one scrape feeds both the price store and the wishlist"""
+    from product_scraper import track_product
 
-        title = soup.find(id="productTitle")
-        price = soup.find("span", {"class": "a-offscreen"})
+    data = track_product(url, threshold)
+    if data is None:
+        raise RuntimeError(f"Failed to scrape {url}")
 
-        product_name = title.get_text(strip=True) if title else "Unknown"
-        price_text = price.get_text(strip=True).replace("₹", "").replace(",", "") if price else "0"
-        price_value = float(price_text) if price_text.replace('.', '', 1).isdigit() else 0.0
+    if add_to_wishlist:
+        today = date.today()
+        append_wishlist_row([
+            "user1",
+            data.get('name', ''),
+            data.get('category', 'General'),
+            threshold,
+            today,
+            today,
+            1,
+            ''
+        ])
 
-        return {
-            "product_name": product_name,
-            "price": price_value,
-            "category": "General",
-        }
+    return data
 
-    except Exception as e:
-        print("Error scraping:", e)
-        return {
-            "product_name": "Unknown",
-            "price": 0.0,
-            "category": "Unknown",
-        }
-    
 
 @app.route("/debug_search", methods=["POST"])
 def debug_search():
+    from scraper import search_all_products
+
     product_name = request.form.get("product_name", "").strip()
     price_range = request.form.get("price_range", "all")
     
@@ -343,63 +350,60 @@ def debug_search():
 
 # Price History graph of each product
 
-@app.route('/price_history/<product_name>')
-def price_history(product_name):
-    csv_file = 'price_data.csv'
-    
-    if not os.path.exists(csv_file):
-        abort(404, description="Price data not found")
-    
-    df = pd.read_csv(csv_file)
-    df['price'] = pd.to_numeric(df['price'], errors='coerce')
-    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-    
-    df = df.dropna(subset=['name', 'price', 'timestamp'])
-    df = df.drop_duplicates(subset=['name', 'timestamp', 'price'])
-
-    # Ensure chronological order
-    df = df.sort_values('timestamp')
-
-    products = sorted(df['name'].unique().tolist())
-    product_data = df[df['name'] == product_name]
-
-    if product_data.empty:
-        abort(404, description=f"No price history for '{product_name}'")
-
-    # Prepare JSON for graph
-    json_data = product_data.assign(
-        timestamp=product_data['timestamp'].dt.strftime('%Y-%m-%d')
-    ).to_dict(orient='records')
+@app.route('/price_history/<path:product_key>')
+def price_history(product_key):
+    from chart_data import HISTORY_RANGES, history_resolution, raw_history_points
+
+    product = store.find_product(product_key)
+    if product is None:
+        abort(404, description=f"No price history for '{product_key}'")
+
+    first, last = store.time_span(product['id'])
+    if first is None:
+        abort(404, description=f"No price history for '{product_key}'")
+
+    # ?range=7d|30d|90d|1y|all picks the window; its length picks the resolution
+    range_name = request.args.get('range', 'all')
+    if range_name not in HISTORY_RANGES:
+        abort(400, description=f"Unknown range '{range_name}'")
+    days = HISTORY_RANGES[range_name]
+    since = last - timedelta(days=days) if days else first
+    since = max(since, first)
+    resolution = history_resolution((last - since).total_seconds() / 86400)
+
+    if resolution == 'raw':
+        # Typed, de-duplicated and chronologically sorted, cached between requests
+        df = store.history()
+        product_data = df[(df['product_id'] == product['id']) & (df['last_seen'] >= since)]
+        json_data = [{"timestamp": ts.strftime('%Y-%m-%d %H:%M'), "price": price}
+                     for ts, price in raw_history_points(product_data)]
+    else:
+        rollups = store.rollups(product['id'], resolution, since)
+        json_data = [{
+            "timestamp": bucket.strftime('%Y-%m-%d'),
+            "price": round(mean, 2),
+            "min": low,
+            "max": high,
+            "last": last_price,
+        } for bucket, low, high, mean, last_price in zip(
+            rollups['bucket'], rollups['min_price'], rollups['max_price'],
+            rollups['mean_price'], rollups['last_price'])]
 
     return render_template(
         'price_history.html',
-        product_name=product_name,
+        product_name=product['name'],
+        product_key=product['product_key'],
         json_data=json.dumps(json_data),  # Pass as JSON string for JS graph
-        products=products
+        resolution=resolution,
+        ranges=list(HISTORY_RANGES),
+        current_range=range_name
     )
 
 
 @app.route("/tracked_products")
 def tracked_products():
-    csv_file = 'price_data.csv'
-    
-    if not os.path.exists(csv_file):
-        abort(404, description="Product list not found")
-    
-    df = pd.read_csv(csv_file)
-    df['price'] = pd.to_numeric(df['price'], errors='coerce')
-    df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-
-    df = df.dropna(subset=['name', 'price', 'site'])
-
-    # Get the latest entry for each product
-    latest_products = (
-        df.sort_values('timestamp')
-          .drop_duplicates(subset=['name'], keep='last')
-          .to_dict(orient='records')
-    )
-
-    return render_template("tracked_products.html", products=latest_products)
+    # One row per product, fetched page by page from /api/products
+    return render_template("tracked_products.html", sites=store.sites())
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,243 @@
+# benchmarks.py
+#
+# Ad-hoc performance checks, run from this directory:
+#   python benchmarks.py intent [--rows 1000000]
+#   python benchmarks.py import-time [--module app] [--runs 5] [--top 15]
+#   python benchmarks.py dedupe [--results 5000]
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+from product_matcher import PRICE_TOLERANCE, NearDuplicateMatcher, title_tokens
+from wishlist_analysis import classify_intent
+
+
+def make_wishlist(rows, seed=0):
+    """Synthetic wishlist shaped like wishlist.csv"""
+    rng = np.random.default_rng(seed)
+    today = pd.Timestamp.now().normalize()
+    last_activity = today - pd.to_timedelta(rng.integers(0, 30, rows), unit='D')
+    intent = np.where(rng.random(rows) < 0.1, 'high', None)
+    return pd.DataFrame({
+        'user_id': 'user' + pd.Series(rng.integers(1, 5000, rows)).astype(str),
+        'item_name': 'item',
+        'category': rng.choice(['Electronics', 'Home & Kitchen', 'Grocery & Gourmet Foods'], rows),
+        'price_threshold': rng.integers(100, 50000, rows).astype(float),
+        'set_date': last_activity.strftime('%Y-%m-%d'),
+        'last_activity': last_activity.strftime('%Y-%m-%d'),
+        'times_visited': rng.integers(1, 10, rows),
+        'intent_score': intent,
+    })
+
+
+def classify_intent_rowwise(df):
+    """The original df.apply(axis=1) implementation, kept as the baseline"""
+    def classify(row):
+        if pd.notnull(row['intent_score']):
+            return row['intent_score']
+        if row['times_visited'] >= 5 and pd.to_datetime(row['last_activity']) >= pd.Timestamp.now() - pd.Timedelta(days=7):
+            return 'high'
+        elif row['times_visited'] >= 3:
+            return 'medium'
+        else:
+            return 'low'
+
+    return df.apply(classify, axis=1)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench_intent(max_rows=1_000_000, rowwise_limit=20_000):
+    print(f"{'rows':>10} {'vectorized (s)':>15} {'row-wise (s)':>13} {'speedup':>8}")
+    rows = 1_000
+    while rows <= max_rows:
+        df = make_wishlist(rows)
+        fast, fast_seconds = _timed(classify_intent, df)
+
+        # The row-wise version is far too slow to run at the larger sizes
+        if rows <= rowwise_limit:
+            slow, slow_seconds = _timed(classify_intent_rowwise, df)
+            assert fast.tolist() == slow.tolist(), "vectorized labels differ from row-wise"
+            print(f"{rows:>10} {fast_seconds:>15.4f} {slow_seconds:>13.4f} {slow_seconds / fast_seconds:>7.0f}x")
+        else:
+            print(f"{rows:>10} {fast_seconds:>15.4f} {'-':>13} {'-':>8}")
+        rows *= 10
+
+
+def parse_importtime(stderr):
+    """{module: cumulative microseconds} from `python -X importtime` output"""
+    cumulative = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, module = line[len("import time:"):].split("|")
+        cumulative[module.strip()] = int(cumulative_us)
+    return cumulative
+
+
+def bench_import_time(module="app", runs=5, top=15):
+    """Cold-start cost of importing `module` in fresh interpreters"""
+    totals = []
+    last = {}
+    for _ in range(runs):
+        proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                              capture_output=True, text=True)
+        if proc.returncode != 0:
+            print(proc.stderr)
+            raise SystemExit(f"import {module} failed")
+        last = parse_importtime(proc.stderr)
+        totals.append(last[module] / 1000)
+
+    print(f"import {module}: median {statistics.median(totals):.1f} ms, "
+          f"min {min(totals):.1f} ms over {runs} runs")
+    print(f"\nTop {top} top-level imports by cumulative time (last run):")
+    top_level = {name: us for name, us in last.items() if "." not in name and name != module}
+    for name, us in sorted(top_level.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"{us / 1000:>10.1f} ms  {name}")
+
+
+def make_search_results(count, seed=0):
+    """Synthetic cross-platform results: each product listed up to four times with
+    reworded titles and slightly different prices. Titles range from a short
+    Flipkart-style name to a long Amazon-style one stuffed with features, and
+    every result carries the index of the product it lists."""
+    rng = np.random.default_rng(seed)
+    brands = ['Apple', 'Samsung', 'Redmi', 'OnePlus', 'Realme', 'boAt', 'Noise', 'Lenovo', 'HP', 'Sony']
+    kinds = ['Phone', 'Earbuds', 'Smartwatch', 'Laptop', 'Speaker', 'Tablet']
+    lines = ['Nova', 'Edge', 'Prime', 'Neo', 'Zen', 'Pulse', 'Aero', 'Vibe', 'Flex', 'Core',
+             'Spark', 'Orbit', 'Halo', 'Nitro', 'Wave', 'Pixel', 'Fusion', 'Blaze', 'Swift', 'Echo']
+    colours = ['Black', 'Blue', 'Green', 'Silver', 'White', 'Gold', 'Purple', 'Red']
+    features = ['Fast Charging', 'AMOLED Display', 'Noise Cancellation', 'Dual SIM', 'Bluetooth 5.3',
+                'Water Resistant', 'Long Battery', 'Dolby Audio', 'Backlit Keyboard', 'AI Camera',
+                'Upto 40 Hours Playback', '120Hz Refresh Rate', 'Type C Port', '1 Year Warranty']
+    results = []
+    product = 0
+    while len(results) < count:
+        brand, kind, line, colour = rng.choice(brands), rng.choice(kinds), rng.choice(lines), rng.choice(colours)
+        model, storage = rng.integers(1, 400), rng.choice([64, 128, 256, 512])
+        extras = ' | '.join(rng.choice(features, size=rng.integers(3, 6), replace=False))
+        price = float(rng.integers(500, 150000))
+        titles = [f"{brand} {line} {model} {kind} ({storage} GB) - {colour}",
+                  f"{brand.upper()} {line} {model} ({colour}, {storage} GB)",
+                  f"{brand} {line} {model} {kind} {storage}GB {colour} with {rng.choice(features)}",
+                  f"{brand} {line} {model} {kind} ({colour},{storage}GB) | {extras}"]
+        rng.shuffle(titles)
+        for title in titles[:rng.integers(1, 5)]:
+            results.append({"name": title, "price": round(price * rng.uniform(0.97, 1.03)),
+                            "product": product})
+        product += 1
+    return results[:count]
+
+
+def dedupe_quality(results, keep):
+    """(missed, lost): duplicate listings kept, and products with no listing kept at all"""
+    kept_per_product = {}
+    for result, kept in zip(results, keep):
+        kept_per_product[result["product"]] = kept_per_product.get(result["product"], 0) + kept
+    missed = sum(max(kept - 1, 0) for kept in kept_per_product.values())
+    lost = sum(1 for kept in kept_per_product.values() if kept == 0)
+    return missed, lost
+
+
+def all_pairs_keep(results):
+    """Keep flags from comparing each result with every kept one, the matcher's reference"""
+    reference = NearDuplicateMatcher()
+    kept = []
+    keep = []
+    for result in results:
+        tokens = title_tokens(result.get("name"))
+        price = result.get("price") or 0.0
+        item = (tokens, frozenset(t for t in tokens if t[0].isdigit()), price)
+        duplicate = bool(tokens) and any(reference._same_product(*item, *other) for other in kept)
+        if tokens and not duplicate:
+            kept.append(item)
+        keep.append(not duplicate)
+    return keep
+
+
+def edge_pairs(count, rng):
+    """Identical titles whose prices are 9-10% apart, just inside PRICE_TOLERANCE"""
+    for i in range(count):
+        price = float(rng.uniform(100, 200_000))
+        other = price * (1 - PRICE_TOLERANCE * rng.uniform(0.9, 1.0))
+        yield [{"name": f"Edge Case Product {i}", "price": p} for p in rng.permutation([price, other])]
+
+
+def check_dedupe_exact(pairs=20_000, mixed_pairs=500, seed=0):
+    """The matcher must make exactly the all-pairs decisions: for identical titles
+    priced right at the edge of PRICE_TOLERANCE, and for a synthetic result set
+    with such pairs mixed in"""
+    rng = np.random.default_rng(seed)
+    differ = 0
+    for pair in edge_pairs(pairs, rng):
+        matcher = NearDuplicateMatcher()
+        differ += [matcher.add(result) for result in pair] != all_pairs_keep(pair)
+    assert differ == 0, f"matcher differs from all-pairs matching on {differ} of {pairs} edge pairs"
+
+    results = make_search_results(2_000, seed)
+    for pair in edge_pairs(mixed_pairs, rng):
+        results += pair
+    matcher = NearDuplicateMatcher()
+    keep = [matcher.add(result) for result in results]
+    differ = sum(a != b for a, b in zip(keep, all_pairs_keep(results)))
+    assert differ == 0, f"matcher differs from all-pairs matching on {differ} of {len(results)} results"
+    print(f"matcher agrees with all-pairs matching on {pairs} edge pairs and "
+          f"{len(results)} mixed results\n")
+
+
+def bench_dedupe(max_results=5_000):
+    """Matcher cost against comparing every result with every kept one, and its
+    recall (duplicate listings merged) and lost products (merged away wrongly)"""
+    print(f"{'results':>8} {'kept':>6} {'comparisons':>12} {'all-pairs':>10} "
+          f"{'recall':>7} {'lost':>5} {'seconds':>8}")
+    results = 500
+    while results <= max_results:
+        data = make_search_results(results)
+        matcher = NearDuplicateMatcher()
+        start = time.perf_counter()
+        keep = []
+        all_pairs = 0
+        for result in data:
+            all_pairs += len(matcher._items)
+            keep.append(matcher.add(result))
+        seconds = time.perf_counter() - start
+
+        missed, lost = dedupe_quality(data, keep)
+        duplicates = len(data) - len({result["product"] for result in data})
+        recall = 1 - missed / duplicates if duplicates else 1.0
+        print(f"{results:>8} {sum(keep):>6} {matcher.comparisons:>12} {all_pairs:>10} "
+              f"{recall:>7.1%} {lost:>5} {seconds:>8.3f}")
+        results *= 2
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Price tracker benchmarks")
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    intent = subparsers.add_parser("intent", help="wishlist intent classification scaling")
+    intent.add_argument("--rows", type=int, default=1_000_000, help="largest wishlist size to time")
+
+    imports = subparsers.add_parser("import-time", help="cold-start import cost report")
+    imports.add_argument("--module", default="app", help="module to import")
+    imports.add_argument("--runs", type=int, default=5)
+    imports.add_argument("--top", type=int, default=15, help="number of imports to list")
+
+    dedupe = subparsers.add_parser("dedupe", help="near-duplicate matcher scaling")
+    dedupe.add_argument("--results", type=int, default=5_000, help="largest result count to match")
+
+    args = parser.parse_args()
+    if args.benchmark == "intent":
+        bench_intent(args.rows)
+    elif args.benchmark == "import-time":
+        bench_import_time(args.module, args.runs, args.top)
+    elif args.benchmark == "dedupe":
+        check_dedupe_exact()
+        bench_dedupe(args.results)
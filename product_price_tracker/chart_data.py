@@ -0,0 +1,200 @@
+# chart_data.py
+
+import hashlib
+import json
+import threading
+
+CHARTS = ('bar', 'box', 'histogram')
+
+# Price history resolution: raw points (downsampled to at most MAX_POINTS) for
+# short ranges, daily rollups up to DAILY_MAX_DAYS, weekly rollups beyond that
+RAW_MAX_DAYS = 31
+DAILY_MAX_DAYS = 366
+MAX_POINTS = 500
+
+HISTORY_RANGES = {'7d': 7, '30d': 30, '90d': 90, '1y': 365, 'all': None}
+
+
+def lttb(x, y, threshold):
+    """Indexes of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last point and, from each of threshold - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the next bucket's average. x must be sorted."""
+    import numpy as np
+
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, threshold - 1).astype(int)
+    kept = [0]
+    for i in range(threshold - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the following bucket (the last point for the final bucket)
+        next_start, next_end = end, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        a = kept[-1]
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a])
+                      - (x[a] - x[start:end]) * (avg_y - y[a]))
+        kept.append(start + int(area.argmax()))
+    kept.append(n - 1)
+    return np.array(kept)
+
+
+def history_resolution(days):
+    """'raw', 'day' or 'week' for a range of `days` days"""
+    if days <= RAW_MAX_DAYS:
+        return 'raw'
+    if days <= DAILY_MAX_DAYS:
+        return 'day'
+    return 'week'
+
+
+def raw_history_points(product_data, max_points=MAX_POINTS):
+    """[(timestamp, price)] from cleaned history rows, runs drawn to their last_seen,
+    downsampled with LTTB when there are more than max_points"""
+    import pandas as pd
+
+    starts = product_data[['timestamp', 'price']]
+    ends = product_data.loc[product_data['last_seen'] > product_data['timestamp'], ['last_seen', 'price']]
+    points = (pd.concat([starts, ends.rename(columns={'last_seen': 'timestamp'})])
+                .sort_values('timestamp', kind='stable'))
+    if len(points) > max_points:
+        keep = lttb(points['timestamp'].astype('int64'), points['price'], max_points)
+        points = points.iloc[keep]
+    return list(zip(points['timestamp'], points['price']))
+
+
+def product_labels(df):
+    """{product_key: display name}; names shared by several products get their key appended"""
+    names = df.groupby('product_key', sort=False)['name'].last()
+    shared = names.duplicated(keep=False)
+    return {key: f"{name} ({key})" if clash else name
+            for key, name, clash in zip(names.index, names, shared)}
+
+
+def weighted_box_stats(values, weights):
+    """Box plot statistics of values each repeated weights times, without repeating them:
+    quartiles as numpy's linear percentile would give, Tukey fences and the mean"""
+    import numpy as np
+
+    values = np.asarray(values, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    order = np.argsort(values, kind='stable')
+    values, weights = values[order], weights[order]
+    ends = np.cumsum(weights)     # one past the last repeat of each value
+    total = ends[-1]
+
+    def quantile(q):
+        position = q * (total - 1)
+        low, high = np.floor(position), np.ceil(position)
+        below = values[np.searchsorted(ends, low, side='right')]
+        above = values[np.searchsorted(ends, high, side='right')]
+        return float(below + (above - below) * (position - low))
+
+    q1, median, q3 = quantile(0.25), quantile(0.5), quantile(0.75)
+    spread = 1.5 * (q3 - q1)
+    return {
+        "q1": q1, "median": median, "q3": q3,
+        "lowerfence": float(values[values >= q1 - spread].min()),
+        "upperfence": float(values[values <= q3 + spread].max()),
+        "mean": float((values * weights).sum() / total),
+    }
+
+
+def build_chart_payloads(df):
+    """Plotly figure specs for every chart, from a single groupby over the history.
+
+    Each history row is a run of identical scrapes, so every statistic is
+    weighted by seen_count: a price seen 100 times counts 100 times."""
+    # Grouped by product identity, not by the free-text name
+    labels = product_labels(df)
+    scrapes = df['seen_count'].fillna(1).clip(lower=1) if 'seen_count' in df else 1
+    weighted = df.assign(label=df['product_key'].map(labels), scrapes=scrapes)
+    weighted = weighted.assign(total=weighted['price'] * weighted['scrapes'])
+    sums = weighted.groupby('label', sort=True)[['total', 'scrapes']].sum()
+    avg_price = sums['total'] / sums['scrapes']
+    # (price, scrapes) pairs per product; distinct prices only, so payloads stay small
+    counts = weighted.groupby(['label', 'price'], sort=True)['scrapes'].sum()
+    prices = {name: (series.index.get_level_values('price').tolist(), series.tolist())
+              for name, series in counts.groupby(level='label', sort=True)}
+
+    bar = {
+        "data": [{
+            "type": "bar",
+            "x": avg_price.index.tolist(),
+            "y": avg_price.round(2).tolist(),
+            "marker": {"color": "indigo"},
+        }],
+        "layout": {
+            "title": {"text": "Average Price per Product"},
+            "xaxis": {"title": {"text": "Product Name"}, "tickangle": -45},
+            "yaxis": {"title": {"text": "Average Price (₹)"}},
+        },
+    }
+
+    box = {
+        "data": [dict({key: [value] for key, value in weighted_box_stats(values, weights).items()}, **{
+            "type": "box",
+            "x": [name],
+            "name": name,
+            "whiskerwidth": 0.2,
+            "line": {"width": 1},
+        }) for name, (values, weights) in prices.items()],
+        "layout": {
+            "title": {"text": "Price Range by Product"},
+            "yaxis": {"title": {"text": "Price (₹)"}},
+            "xaxis": {"title": {"text": "Product"}, "tickangle": -45},
+            "boxmode": "group",
+            "showlegend": False,
+            "height": 600,
+            "margin": {"l": 40, "r": 40, "t": 60, "b": 150},
+        },
+    }
+
+    histogram = {
+        "data": [{
+            "type": "histogram",
+            "x": values,
+            "y": weights,
+            "histfunc": "sum",
+            "name": name,
+            "opacity": 0.6,
+        } for name, (values, weights) in prices.items()],
+        "layout": {
+            "title": {"text": "Price Distribution by Product"},
+            "xaxis": {"title": {"text": "Price (₹)"}},
+            "yaxis": {"title": {"text": "Count"}},
+            "barmode": "overlay",
+            "height": 600,
+        },
+    }
+
+    return {"bar": bar, "box": box, "histogram": histogram}
+
+
+class ChartDataService:
+    """Serialised chart payloads, recomputed only when the price store changes"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._version = None
+        self._etag = None
+        self._payloads = {}
+
+    def get(self, chart):
+        """Returns (json_text, etag) for one of CHARTS"""
+        with self._lock:
+            version = self.store.file_signature()
+            if version != self._version:
+                payloads = build_chart_payloads(self.store.history())
+                self._payloads = {name: json.dumps(payload) for name, payload in payloads.items()}
+                self._etag = hashlib.md5(repr(version).encode()).hexdigest()
+                self._version = version
+            return self._payloads[chart], self._etag
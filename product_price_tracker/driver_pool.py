@@ -0,0 +1,215 @@
+# driver_pool.py
+
+from contextlib import contextmanager
+import atexit
+import os
+import random
+import threading
+
+# Number of Chrome instances kept per pool and how many pages each one serves
+# before it is quit and replaced with a fresh browser.
+POOL_SIZE = 3
+MAX_PAGES_PER_DRIVER = 50
+
+# Pin the chromedriver binary (e.g. on air-gapped hosts) to skip online resolution
+CHROMEDRIVER_PATH = os.environ.get('CHROMEDRIVER_PATH')
+
+USER_AGENTS = [
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+]
+
+
+_driver_path = None
+_driver_path_resolved = False
+_driver_path_lock = threading.Lock()
+
+
+def resolve_driver_path():
+    """chromedriver binary for this process, resolved only once.
+
+    Returns None when nothing could be resolved, in which case Selenium falls
+    back to its own lookup (Selenium Manager or chromedriver on PATH)."""
+    global _driver_path, _driver_path_resolved
+    with _driver_path_lock:
+        if _driver_path_resolved:
+            return _driver_path
+
+        if CHROMEDRIVER_PATH:
+            if not os.path.isfile(CHROMEDRIVER_PATH):
+                raise FileNotFoundError(f"CHROMEDRIVER_PATH does not exist: {CHROMEDRIVER_PATH}")
+            _driver_path = CHROMEDRIVER_PATH
+        else:
+            try:
+                from webdriver_manager.chrome import ChromeDriverManager
+                _driver_path = ChromeDriverManager().install()
+            except Exception as e:
+                print(f"Could not resolve chromedriver with webdriver_manager, using PATH: {e}")
+                _driver_path = None
+
+        _driver_path_resolved = True
+        return _driver_path
+
+
+def create_driver(headless=True):
+    """Launch a Chrome instance with the shared scraping options"""
+    # Selenium is only needed once a browser is actually launched
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    options = Options()
+
+    if headless:
+        options.add_argument("--headless")
+
+    # Performance and stealth options
+    options.add_argument("--disable-gpu")
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_experimental_option("excludeSwitches", ["enable-automation"])
+    options.add_experimental_option('useAutomationExtension', False)
+    options.add_argument(f"user-agent={random.choice(USER_AGENTS)}")
+
+    service = Service(resolve_driver_path())
+    driver = webdriver.Chrome(service=service, options=options)
+
+    # Execute script to remove webdriver property
+    driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+
+    return driver
+
+
+class DriverPool:
+    """Bounded pool of warm WebDriver instances shared by all scrapers"""
+
+    def __init__(self, max_size=POOL_SIZE, max_pages=MAX_PAGES_PER_DRIVER, factory=create_driver):
+        self.max_size = max_size
+        self.max_pages = max_pages
+        self.factory = factory
+        self._idle = []
+        self._pages = {}
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+    def checkout(self, timeout=None):
+        """Borrow a healthy driver, starting a new one if the pool has room"""
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Driver pool has been shut down")
+
+                driver = None
+                if self._idle:
+                    driver = self._idle.pop()
+                elif self._created < self.max_size:
+                    self._created += 1
+                elif not self._cond.wait(timeout):
+                    raise TimeoutError("No WebDriver available in pool")
+                else:
+                    continue
+
+            if driver is None:
+                try:
+                    driver = self.factory()
+                except Exception:
+                    self._forget(None)
+                    raise
+                self._pages[id(driver)] = 0
+                return driver
+
+            if self.is_alive(driver):
+                return driver
+
+            print("Discarding crashed WebDriver from pool")
+            self._discard(driver)
+
+    def checkin(self, driver, healthy=True):
+        """Return a driver to the pool, recycling it if it is worn out or broken"""
+        if driver is None:
+            return
+
+        pages = self._pages.get(id(driver), 0) + 1
+        self._pages[id(driver)] = pages
+
+        with self._cond:
+            keep = healthy and not self._closed and pages < self.max_pages
+            if keep:
+                self._idle.append(driver)
+                self._cond.notify()
+                return
+
+        self._discard(driver)
+
+    @contextmanager
+    def driver(self, timeout=None):
+        """Context manager wrapping checkout/checkin"""
+        driver = self.checkout(timeout)
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = self.is_alive(driver)
+            raise
+        finally:
+            self.checkin(driver, healthy)
+
+    @staticmethod
+    def is_alive(driver):
+        """Cheap round-trip to make sure the browser session still responds"""
+        try:
+            driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def shutdown(self):
+        """Quit every idle browser and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+
+        for driver in idle:
+            self._discard(driver)
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            print(f"Error quitting WebDriver: {e}")
+        self._forget(driver)
+
+    def _forget(self, driver):
+        if driver is not None:
+            self._pages.pop(id(driver), None)
+        with self._cond:
+            self._created -= 1
+            self._cond.notify()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(headless=True):
+    """Process-wide pool shared by scraper.py and product_scraper.py"""
+    with _pools_lock:
+        pool = _pools.get(headless)
+        if pool is None:
+            pool = DriverPool(factory=lambda: create_driver(headless))
+            _pools[headless] = pool
+        return pool
+
+
+@atexit.register
+def shutdown_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
@@ -0,0 +1,131 @@
+# fetcher.py
+
+from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+import requests
+import threading
+import time
+from driver_pool import get_pool
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-IN,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+HTTP_TIMEOUT = 10
+
+# Ceiling for browser readiness waits; pages normally become ready well before it
+WAIT_TIMEOUT = 10
+
+_session = None
+_session_lock = threading.Lock()
+
+_timings = {}
+_timings_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide keep-alive session shared by every plain HTTP fetch"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(HEADERS)
+            adapter = HTTPAdapter(pool_connections=10, pool_maxsize=20)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _session = session
+        return _session
+
+
+def has_selectors(soup, selectors):
+    """True when every CSS selector (comma lists allowed) matches something"""
+    return all(soup.select_one(selector) for selector in selectors)
+
+
+def record_timing(site, method, seconds, ready):
+    """Accumulate how long each site took to become usable per fetch method"""
+    with _timings_lock:
+        entry = _timings.setdefault((site, method), {
+            "count": 0, "ready": 0, "total_seconds": 0.0, "max_seconds": 0.0
+        })
+        entry["count"] += 1
+        entry["ready"] += 1 if ready else 0
+        entry["total_seconds"] += seconds
+        entry["max_seconds"] = max(entry["max_seconds"], seconds)
+
+
+def get_fetch_metrics():
+    """Per-site timing summary, e.g. {'Amazon': {'http': {...}, 'browser': {...}}}"""
+    metrics = {}
+    with _timings_lock:
+        for (site, method), entry in _timings.items():
+            metrics.setdefault(site, {})[method] = {
+                "count": entry["count"],
+                "ready": entry["ready"],
+                "not_ready": entry["count"] - entry["ready"],
+                "avg_seconds": round(entry["total_seconds"] / entry["count"], 3),
+                "max_seconds": round(entry["max_seconds"], 3),
+            }
+    return metrics
+
+
+def wait_until_ready(driver, selectors, site, timeout=WAIT_TIMEOUT):
+    """Wait until every CSS selector is present or the ceiling is hit"""
+    # Imported here so the plain HTTP path never loads Selenium
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    start = time.monotonic()
+    ready = True
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=0.2).until(
+            lambda d: all(d.find_elements(By.CSS_SELECTOR, selector) for selector in selectors)
+        )
+    except TimeoutException:
+        ready = False
+        print(f"{site} page not ready after {timeout}s")
+
+    record_timing(site, "browser", time.monotonic() - start, ready)
+    return ready
+
+
+def fetch_soup_http(url, required_selectors=(), site="unknown"):
+    """Fetch with requests; returns None if the page is blocked or incomplete"""
+    start = time.monotonic()
+    soup = None
+    try:
+        response = get_session().get(url, timeout=HTTP_TIMEOUT)
+        if response.status_code == 200:
+            soup = BeautifulSoup(response.content, 'html.parser')
+            if not has_selectors(soup, required_selectors):
+                soup = None
+    except requests.RequestException as e:
+        print(f"HTTP fetch failed for {url}: {e}")
+
+    record_timing(site, "http", time.monotonic() - start, soup is not None)
+    return soup
+
+
+def fetch_soup_browser(url, required_selectors=(), site="unknown", timeout=WAIT_TIMEOUT):
+    """Render the page in a pooled headless browser, waiting only until it is ready"""
+    with get_pool().driver() as driver:
+        driver.get(url)
+        wait_until_ready(driver, required_selectors, site, timeout)
+        html = driver.page_source
+
+    return BeautifulSoup(html, 'html.parser')
+
+
+def fetch_soup(url, required_selectors=(), site="unknown", timeout=WAIT_TIMEOUT):
+    """Try the cheap HTTP path first and only escalate to a browser when the
+    required selectors did not resolve (JS-rendered page, captcha, error)"""
+    soup = fetch_soup_http(url, required_selectors, site)
+    if soup is not None:
+        return soup
+
+    print(f"Falling back to browser for {url}")
+    return fetch_soup_browser(url, required_selectors, site, timeout)
@@ -0,0 +1,63 @@
+# jobs.py
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import uuid
+from datetime import datetime
+
+MAX_FINISHED_JOBS = 500   # finished jobs kept around for status lookups
+
+
+class JobQueue:
+    """Runs slow work (scrapes) off the request thread and tracks its status"""
+
+    def __init__(self, workers=2, max_finished=MAX_FINISHED_JOBS):
+        self.max_finished = max_finished
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="jobs")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, **kwargs):
+        """Queue func(*args, **kwargs) and return the new job id"""
+        job_id = uuid.uuid4().hex[:12]
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id,
+                "status": "queued",
+                "created_at": _now(),
+                "finished_at": None,
+                "result": None,
+                "error": None,
+            }
+            self._prune()
+        self._executor.submit(self._run, job_id, func, args, kwargs)
+        return job_id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def _run(self, job_id, func, args, kwargs):
+        self._update(job_id, status="running")
+        try:
+            result = func(*args, **kwargs)
+            self._update(job_id, status="done", result=result, finished_at=_now())
+        except Exception as e:
+            print(f"Job {job_id} failed: {e}")
+            self._update(job_id, status="failed", error=str(e), finished_at=_now())
+
+    def _update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"]]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+
+def _now():
+    return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
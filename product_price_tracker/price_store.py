@@ -0,0 +1,763 @@
+# price_store.py
+
+from datetime import datetime, timedelta
+import base64
+import csv
+import json
+import os
+import sqlite3
+import threading
+from alert_engine import AlertEngine, SCHEMA as ALERT_SCHEMA
+from site_adapters import canonicalize
+
+# pandas is imported where frames are built so scrapers and app start-up don't pay for it
+
+DB_FILE = 'price_data.db'
+CSV_FILE = 'price_data.csv'
+
+# Unchanged re-scrapes extend the latest observation's run (last_seen, seen_count)
+# instead of adding a row; a new row is still written once a run is this old so
+# the history keeps a periodic heartbeat.
+DEDUPE_WRITES = True
+HEARTBEAT_INTERVAL = 24 * 60 * 60
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Writes run inside one transaction holding SQLite's write lock, so this is race-free
+NEXT_REVISION = "(SELECT COALESCE(MAX(revision), 0) + 1 FROM observations)"
+
+# Column order of the original price_data.csv; history() frames start with it
+COLUMNS = ['timestamp', 'site', 'name', 'price', 'brand', 'rating', 'url', 'threshold']
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id          INTEGER PRIMARY KEY,
+    url         TEXT NOT NULL UNIQUE,   -- canonical URL, see site_adapters.canonicalize
+    site        TEXT,
+    name        TEXT,
+    brand       TEXT,
+    threshold   REAL,
+    product_key TEXT                    -- e.g. amazon.in:B0DRL635G7
+);
+
+CREATE TABLE IF NOT EXISTS observations (
+    id         INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    timestamp  TEXT NOT NULL,         -- first scrape of this run
+    price      REAL,
+    rating     REAL,
+    threshold  REAL,
+    last_seen  TEXT,                  -- latest scrape that found the same values
+    seen_count INTEGER NOT NULL DEFAULT 1,
+    revision   INTEGER NOT NULL DEFAULT 0   -- bumped on insert and on every run extension
+);
+
+CREATE INDEX IF NOT EXISTS idx_observations_product_time ON observations(product_id, timestamp);
+CREATE INDEX IF NOT EXISTS idx_observations_time ON observations(timestamp);
+CREATE INDEX IF NOT EXISTS idx_products_site ON products(site);
+
+-- Most recent observation per product, maintained on every write
+CREATE TABLE IF NOT EXISTS latest_observations (
+    product_id     INTEGER PRIMARY KEY REFERENCES products(id),
+    observation_id INTEGER NOT NULL,
+    timestamp      TEXT NOT NULL,
+    price          REAL,
+    rating         REAL,
+    threshold      REAL
+);
+
+-- Per-product daily and weekly price aggregates, maintained on every write
+CREATE TABLE IF NOT EXISTS price_rollups (
+    product_id     INTEGER NOT NULL REFERENCES products(id),
+    resolution     TEXT NOT NULL,      -- 'day' or 'week'
+    bucket         TEXT NOT NULL,      -- first day of the bucket, YYYY-MM-DD (weeks start Monday)
+    min_price      REAL,
+    max_price      REAL,
+    sum_price      REAL,
+    samples        INTEGER NOT NULL,   -- scrapes, including those folded into runs
+    last_price     REAL,
+    last_timestamp TEXT,
+    PRIMARY KEY (product_id, resolution, bucket)
+);
+
+-- Sort keys for the paginated listing APIs
+CREATE INDEX IF NOT EXISTS idx_observations_price ON observations(price, id);
+CREATE INDEX IF NOT EXISTS idx_latest_timestamp ON latest_observations(timestamp, product_id);
+CREATE INDEX IF NOT EXISTS idx_latest_price ON latest_observations(price, product_id);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+ROLLUP_RESOLUTIONS = ('day', 'week')
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Listing sorts: name -> (sort column, unique tie-breaker); prefix the name with '-' for descending
+PRODUCT_SORTS = {
+    'updated': ('l.timestamp', 'l.product_id'),
+    'price': ('l.price', 'l.product_id'),
+    'name': ('p.name', 'l.product_id'),
+}
+OBSERVATION_SORTS = {
+    'time': ('o.timestamp', 'o.id'),
+    'price': ('o.price', 'o.id'),
+}
+
+
+class PriceStore:
+    """SQLite-backed store of tracked products and their price observations"""
+
+    def __init__(self, path=DB_FILE, csv_file=CSV_FILE, dedupe=DEDUPE_WRITES,
+                 heartbeat=HEARTBEAT_INTERVAL, alerts=None):
+        self.path = path
+        self.dedupe = dedupe
+        self.heartbeat = heartbeat
+        self.alerts = alerts if alerts is not None else AlertEngine()
+        self._local = threading.local()
+        self._history = HistoryCache(self)
+        with self.connect() as conn:
+            conn.executescript(SCHEMA + ALERT_SCHEMA)
+        self._add_run_columns()
+        self._canonicalize_products()
+        if csv_file:
+            self.migrate_csv(csv_file)
+        self._drop_failed_scrapes()
+        self._backfill_latest()
+        if dedupe:
+            self.compact()
+        self._backfill_rollups()
+        self._backfill_alerts()
+
+    def connect(self):
+        """One connection per thread; WAL lets readers run alongside a writer"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn = conn
+        return conn
+
+    def migrate_csv(self, csv_file):
+        """One-shot import of the legacy append-only CSV"""
+        conn = self.connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'csv_migrated'").fetchone():
+            return 0
+        if not os.path.exists(csv_file):
+            return 0
+
+        with open(csv_file, newline='', encoding='utf-8') as f:
+            rows = [row for row in csv.DictReader(f) if row.get('url')]
+
+        with conn:
+            self._insert(conn, rows)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('csv_migrated', ?)", (csv_file,))
+
+        print(f"Migrated {len(rows)} rows from {csv_file} into {self.path}")
+        return len(rows)
+
+    def add_observation(self, data):
+        self.add_observations([data])
+
+    def add_observations(self, rows):
+        """Write scraped rows (dicts with the CSV columns) in one transaction.
+
+        Each row is checked against its threshold as it is written; alerts that
+        fire are committed with the rows, handed to the alert sinks and returned."""
+        conn = self.connect()
+        alerts = []
+        with conn:
+            self._insert(conn, rows, alerts)
+        self.alerts.dispatch(alerts)
+        return alerts
+
+    def recent_alerts(self, limit=PAGE_SIZE):
+        """Most recent alerts first, with each product's latest rating"""
+        rows = self.connect().execute(
+            """
+            SELECT a.id, a.timestamp, a.price, a.threshold, p.product_key, p.site, p.name,
+                   p.brand, p.url, l.rating
+            FROM alerts a JOIN products p ON p.id = a.product_id
+            LEFT JOIN latest_observations l ON l.product_id = a.product_id
+            ORDER BY a.timestamp DESC, a.id DESC
+            LIMIT ?
+            """,
+            (max(1, min(int(limit), MAX_PAGE_SIZE)),)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def tracked_products(self):
+        """Every distinct tracked product's canonical URL with its most recent threshold (or None)"""
+        rows = self.connect().execute("SELECT url, threshold FROM products ORDER BY id").fetchall()
+        return {row['url']: row['threshold'] for row in rows}
+
+    def compact(self):
+        """Fold existing back-to-back identical observations into runs (once per database)"""
+        conn = self.connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'runs_compacted'").fetchone():
+            return 0
+
+        rows = conn.execute("""
+            SELECT id, product_id, timestamp, price, rating, threshold,
+                   COALESCE(last_seen, timestamp) AS last_seen, seen_count
+            FROM observations ORDER BY product_id, timestamp, id
+        """).fetchall()
+
+        merged = []    # ids folded into the run before them
+        runs = {}      # run head id -> (last_seen, seen_count), for heads that absorbed rows
+        head = None
+        for row in rows:
+            if head is not None and self._extends_run(head, last_seen, row):
+                last_seen = max(last_seen, row['last_seen'])
+                seen_count += row['seen_count']
+                runs[head['id']] = (last_seen, seen_count)
+                merged.append(row['id'])
+            else:
+                head, last_seen, seen_count = row, row['last_seen'], row['seen_count']
+
+        with conn:
+            if merged:
+                conn.executemany("DELETE FROM observations WHERE id = ?", [(i,) for i in merged])
+                conn.executemany(
+                    f"UPDATE observations SET last_seen = ?, seen_count = ?, revision = {NEXT_REVISION} WHERE id = ?",
+                    [(last_seen, seen_count, run_id) for run_id, (last_seen, seen_count) in runs.items()]
+                )
+                conn.execute("DELETE FROM meta WHERE key = 'latest_backfilled'")
+                conn.execute("DELETE FROM latest_observations")
+            conn.execute("INSERT INTO meta (key, value) VALUES ('runs_compacted', ?)", (str(len(merged)),))
+        if merged:
+            self._backfill_latest()
+            print(f"Compacted {len(merged)} repeated observations into runs")
+        return len(merged)
+
+    def sites(self):
+        """Distinct sites with tracked products, for filter dropdowns"""
+        rows = self.connect().execute("SELECT DISTINCT site FROM products WHERE site IS NOT NULL ORDER BY site")
+        return [row['site'] for row in rows]
+
+    def list_products(self, site=None, min_price=None, max_price=None, below_threshold=False,
+                      sort='-updated', cursor=None, limit=PAGE_SIZE):
+        """One page of products with their latest observation: (items, next_cursor)"""
+        query = """
+            SELECT l.product_id AS id, p.product_key, p.site, p.name, p.brand, p.url,
+                   l.timestamp, l.price, l.rating, l.threshold
+            FROM latest_observations l JOIN products p ON p.id = l.product_id
+        """
+        return self._page(query, 'l', PRODUCT_SORTS, site, min_price, max_price,
+                          below_threshold, sort, cursor, limit)
+
+    def list_observations(self, site=None, min_price=None, max_price=None, below_threshold=False,
+                          sort='-time', cursor=None, limit=PAGE_SIZE):
+        """One page of raw observations (runs), newest first by default: (items, next_cursor)"""
+        query = """
+            SELECT o.id, p.product_key, p.site, p.name, p.brand, p.url,
+                   o.timestamp, COALESCE(o.last_seen, o.timestamp) AS last_seen, o.seen_count,
+                   o.price, o.rating, o.threshold
+            FROM observations o JOIN products p ON p.id = o.product_id
+        """
+        return self._page(query, 'o', OBSERVATION_SORTS, site, min_price, max_price,
+                          below_threshold, sort, cursor, limit)
+
+    def _page(self, query, alias, sorts, site, min_price, max_price, below_threshold, sort, cursor, limit):
+        # Keyset pagination: the cursor is the last row's (sort value, id), so every
+        # page is an index range scan no matter how deep the client has paged
+        descending = sort.startswith('-')
+        if sort.lstrip('-') not in sorts:
+            raise ValueError(f"Unknown sort '{sort}'")
+        column, tie_breaker = sorts[sort.lstrip('-')]
+        limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+
+        where = [f"{column} IS NOT NULL"]
+        params = []
+        if site:
+            where.append("p.site = ?")
+            params.append(site)
+        if min_price is not None:
+            where.append(f"{alias}.price >= ?")
+            params.append(float(min_price))
+        if max_price is not None:
+            where.append(f"{alias}.price <= ?")
+            params.append(float(max_price))
+        if below_threshold:
+            where.append(f"{alias}.price < {alias}.threshold")
+        if cursor:
+            where.append(f"({column}, {tie_breaker}) {'<' if descending else '>'} (?, ?)")
+            params.extend(_decode_cursor(cursor))
+
+        direction = 'DESC' if descending else 'ASC'
+        rows = self.connect().execute(
+            f"{query} WHERE {' AND '.join(where)} "
+            f"ORDER BY {column} {direction}, {tie_breaker} {direction} LIMIT ?",
+            params + [limit + 1]
+        ).fetchall()
+
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = rows[limit - 1]
+            next_cursor = _encode_cursor(last[column.split('.')[1]], last['id'])
+        return items, next_cursor
+
+    def find_product(self, product_key):
+        """Product row (as a dict) for a product key, or by exact name for old links"""
+        conn = self.connect()
+        row = conn.execute("SELECT * FROM products WHERE product_key = ?", (product_key,)).fetchone()
+        if row is None:
+            row = conn.execute(
+                """
+                SELECT p.* FROM products p LEFT JOIN latest_observations l ON l.product_id = p.id
+                WHERE p.name = ? ORDER BY l.timestamp DESC LIMIT 1
+                """,
+                (product_key,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def time_span(self, product_id):
+        """(first, last) scrape timestamps of a product as datetimes, or (None, None)"""
+        row = self.connect().execute(
+            """
+            SELECT MIN(timestamp) AS first, MAX(COALESCE(last_seen, timestamp)) AS last
+            FROM observations WHERE product_id = ?
+            """,
+            (product_id,)
+        ).fetchone()
+        try:
+            return (datetime.strptime(row['first'], TIMESTAMP_FORMAT),
+                    datetime.strptime(row['last'], TIMESTAMP_FORMAT))
+        except (TypeError, ValueError):
+            return None, None
+
+    def rollups(self, product_id, resolution, since=None):
+        """Daily or weekly min/max/mean/last prices for one product, oldest bucket first"""
+        import pandas as pd
+
+        if resolution not in ROLLUP_RESOLUTIONS:
+            raise ValueError(f"Unknown rollup resolution '{resolution}'")
+        since_bucket = _rollup_bucket(resolution, since) if since else ''
+        df = pd.read_sql_query(
+            """
+            SELECT bucket, min_price, max_price, sum_price / samples AS mean_price,
+                   last_price, samples
+            FROM price_rollups
+            WHERE product_id = ? AND resolution = ? AND bucket >= ?
+            ORDER BY bucket
+            """,
+            self.connect(), params=(product_id, resolution, since_bucket)
+        )
+        df['bucket'] = pd.to_datetime(df['bucket'])
+        return df
+
+    def history(self):
+        """Cleaned, chronologically sorted history served from memory (treat as read-only)"""
+        return self._history.load()
+
+    def file_signature(self):
+        """Changes whenever this or another process writes to the database"""
+        signature = []
+        for path in (self.path, self.path + '-wal'):
+            try:
+                st = os.stat(path)
+                signature.append((st.st_mtime_ns, st.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _insert(self, conn, rows, alerts=None):
+        # alerts: list to collect fired alerts into; None (migrations) skips evaluation
+        for row in rows:
+            values = (row.get('timestamp'), _to_float(row.get('price')),
+                      _to_float(row.get('rating')), _to_float(row.get('threshold')))
+            if not _is_price(values[1]):
+                continue   # the price selector missed: a failed scrape, not a ₹0 price
+            product_id, threshold = self._upsert_product(conn, row)
+            # A scrape without a threshold (a re-track, a refresh round) keeps the product's own
+            values = values[:3] + (threshold,)
+            self._add_to_rollups(conn, product_id, values[0], values[1])
+            if alerts is not None:
+                alert = self.alerts.evaluate(conn, product_id, values[0], values[1], values[3])
+                if alert:
+                    alerts.append(alert)
+            if self.dedupe and self._extend_latest_run(conn, product_id, values):
+                continue
+            cursor = conn.execute(
+                f"""
+                INSERT INTO observations (product_id, timestamp, price, rating, threshold, last_seen, revision)
+                VALUES (?, ?, ?, ?, ?, ?, {NEXT_REVISION})
+                """,
+                (product_id,) + values + (values[0],)
+            )
+            conn.execute(
+                """
+                INSERT INTO latest_observations (product_id, observation_id, timestamp, price, rating, threshold)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(product_id) DO UPDATE SET
+                    observation_id = excluded.observation_id,
+                    timestamp = excluded.timestamp,
+                    price = excluded.price,
+                    rating = excluded.rating,
+                    threshold = excluded.threshold
+                WHERE excluded.timestamp >= latest_observations.timestamp
+                """,
+                (product_id, cursor.lastrowid) + values
+            )
+
+    def _add_to_rollups(self, conn, product_id, timestamp, price, samples=1):
+        if price is None:
+            return
+        try:
+            scraped = datetime.strptime(timestamp, TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            return
+        for resolution in ROLLUP_RESOLUTIONS:
+            conn.execute(
+                """
+                INSERT INTO price_rollups (product_id, resolution, bucket, min_price, max_price,
+                                           sum_price, samples, last_price, last_timestamp)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(product_id, resolution, bucket) DO UPDATE SET
+                    min_price = MIN(min_price, excluded.min_price),
+                    max_price = MAX(max_price, excluded.max_price),
+                    sum_price = sum_price + excluded.sum_price,
+                    samples = samples + excluded.samples,
+                    last_price = CASE WHEN excluded.last_timestamp >= last_timestamp
+                                      THEN excluded.last_price ELSE last_price END,
+                    last_timestamp = MAX(last_timestamp, excluded.last_timestamp)
+                """,
+                (product_id, resolution, _rollup_bucket(resolution, scraped),
+                 price, price, price * samples, samples, price, timestamp)
+            )
+
+    def _backfill_rollups(self):
+        # Rebuilt from observations once, and again whenever products were merged.
+        # A run counts its first scrape at `timestamp` and the rest at `last_seen`.
+        conn = self.connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'rollups_backfilled'").fetchone():
+            return
+        rows = conn.execute("""
+            SELECT product_id, timestamp, COALESCE(last_seen, timestamp) AS last_seen, seen_count, price
+            FROM observations ORDER BY id
+        """).fetchall()
+        with conn:
+            conn.execute("DELETE FROM price_rollups")
+            for row in rows:
+                self._add_to_rollups(conn, row['product_id'], row['timestamp'], row['price'])
+                if row['seen_count'] > 1:
+                    self._add_to_rollups(conn, row['product_id'], row['last_seen'], row['price'],
+                                         samples=row['seen_count'] - 1)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('rollups_backfilled', '1')")
+
+    def _extend_latest_run(self, conn, product_id, values):
+        # Only an in-order scrape with identical price, rating and threshold extends a run
+        latest = conn.execute(
+            """
+            SELECT o.id, o.product_id, o.timestamp, o.price, o.rating, o.threshold,
+                   COALESCE(o.last_seen, o.timestamp) AS last_seen
+            FROM latest_observations l JOIN observations o ON o.id = l.observation_id
+            WHERE l.product_id = ?
+            """,
+            (product_id,)
+        ).fetchone()
+        timestamp, price, rating, threshold = values
+        row = {'product_id': product_id, 'timestamp': timestamp, 'last_seen': timestamp,
+               'price': price, 'rating': rating, 'threshold': threshold}
+        if latest is None or not self._extends_run(latest, latest['last_seen'], row):
+            return False
+
+        conn.execute(
+            f"UPDATE observations SET last_seen = ?, seen_count = seen_count + 1, revision = {NEXT_REVISION} WHERE id = ?",
+            (timestamp, latest['id'])
+        )
+        conn.execute(
+            "UPDATE latest_observations SET timestamp = ? WHERE product_id = ?",
+            (timestamp, product_id)
+        )
+        return True
+
+    def _extends_run(self, head, last_seen, row):
+        if (head['product_id'], head['price'], head['rating'], head['threshold']) != \
+                (row['product_id'], row['price'], row['rating'], row['threshold']):
+            return False
+        try:
+            started = datetime.strptime(head['timestamp'], TIMESTAMP_FORMAT)
+            seen = datetime.strptime(row['timestamp'], TIMESTAMP_FORMAT)
+        except (TypeError, ValueError):
+            return False
+        return row['timestamp'] >= last_seen and (seen - started).total_seconds() < self.heartbeat
+
+    def _add_run_columns(self):
+        # Databases created before run-length writes lack last_seen/seen_count/revision
+        conn = self.connect()
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(observations)")}
+        with conn:
+            if 'last_seen' not in columns:
+                conn.execute("ALTER TABLE observations ADD COLUMN last_seen TEXT")
+            if 'seen_count' not in columns:
+                conn.execute("ALTER TABLE observations ADD COLUMN seen_count INTEGER NOT NULL DEFAULT 1")
+            if 'revision' not in columns:
+                conn.execute("ALTER TABLE observations ADD COLUMN revision INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_observations_revision ON observations(revision)")
+
+    def _canonicalize_products(self):
+        # Key every product on its site ID and merge rows that were the same product
+        # under different tracking URLs. Cheap enough to check on every start.
+        conn = self.connect()
+        columns = {row['name'] for row in conn.execute("PRAGMA table_info(products)")}
+        with conn:
+            if 'product_key' not in columns:
+                conn.execute("ALTER TABLE products ADD COLUMN product_key TEXT")
+
+            groups = {}   # key -> (canonical url, [product rows], oldest first)
+            for row in conn.execute("SELECT id, url, product_key FROM products ORDER BY id").fetchall():
+                key, url = canonicalize(row['url'])
+                groups.setdefault(key, (url, []))[1].append(row)
+
+            merged = 0
+            for key, (url, rows) in groups.items():
+                survivor = rows[0]
+                for row in rows[1:]:
+                    conn.execute("UPDATE observations SET product_id = ? WHERE product_id = ?",
+                                 (survivor['id'], row['id']))
+                    conn.execute("DELETE FROM latest_observations WHERE product_id = ?", (row['id'],))
+                    conn.execute("DELETE FROM price_rollups WHERE product_id = ?", (row['id'],))
+                    conn.execute("UPDATE alerts SET product_id = ? WHERE product_id = ?",
+                                 (survivor['id'], row['id']))
+                    conn.execute("DELETE FROM alert_state WHERE product_id = ?", (row['id'],))
+                    conn.execute("DELETE FROM products WHERE id = ?", (row['id'],))
+                    merged += 1
+            for key, (url, rows) in groups.items():
+                if rows[0]['product_key'] != key or rows[0]['url'] != url:
+                    conn.execute("UPDATE products SET product_key = ?, url = ? WHERE id = ?",
+                                 (key, url, rows[0]['id']))
+
+            conn.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_products_key ON products(product_key)")
+            if merged:
+                # Latest rows and runs have to be rebuilt across the merged products
+                conn.execute("DELETE FROM latest_observations")
+                conn.execute("DELETE FROM meta WHERE key IN "
+                             "('latest_backfilled', 'runs_compacted', 'rollups_backfilled')")
+        if merged:
+            print(f"Merged {merged} duplicate products by canonical product ID")
+
+    def _drop_failed_scrapes(self):
+        # Older versions stored a missed price selector as a 0.0 (or empty) price, which
+        # reads as a huge drop everywhere; remove those rows and rebuild what they fed
+        conn = self.connect()
+        if not conn.execute("SELECT 1 FROM observations WHERE price IS NULL OR price <= 0 LIMIT 1").fetchone():
+            return
+        with conn:
+            dropped = conn.execute("DELETE FROM observations WHERE price IS NULL OR price <= 0").rowcount
+            conn.execute("DELETE FROM alerts WHERE price IS NULL OR price <= 0")
+            conn.execute("DELETE FROM alert_state WHERE last_price IS NULL OR last_price <= 0")
+            conn.execute("DELETE FROM latest_observations")
+            conn.execute("DELETE FROM meta WHERE key IN "
+                         "('latest_backfilled', 'runs_compacted', 'rollups_backfilled')")
+        print(f"Dropped {dropped} failed scrapes recorded without a price")
+
+    def _backfill_latest(self):
+        # Databases created before latest_observations existed need it populated once
+        conn = self.connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'latest_backfilled'").fetchone():
+            return
+        with conn:
+            conn.execute("""
+                INSERT OR REPLACE INTO latest_observations
+                    (product_id, observation_id, timestamp, price, rating, threshold)
+                SELECT product_id, id, timestamp, price, rating, threshold
+                FROM (
+                    SELECT o.*, ROW_NUMBER() OVER (
+                        PARTITION BY product_id ORDER BY timestamp DESC, id DESC
+                    ) AS rn
+                    FROM observations o
+                )
+                WHERE rn = 1
+            """)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('latest_backfilled', '1')")
+
+    def _backfill_alerts(self):
+        # Products already below threshold when the engine arrived count as alerted,
+        # so the first scrape after upgrading doesn't re-announce every old deal
+        conn = self.connect()
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'alerts_backfilled'").fetchone():
+            return
+        with conn:
+            below = """
+                FROM latest_observations
+                WHERE price IS NOT NULL AND threshold > 0 AND price < threshold
+            """
+            conn.execute(f"""
+                INSERT OR IGNORE INTO alert_state (product_id, triggered, last_price, last_alert_at)
+                SELECT product_id, 1, price, timestamp {below}
+            """)
+            conn.execute(f"""
+                INSERT INTO alerts (product_id, timestamp, price, threshold)
+                SELECT product_id, timestamp, price, threshold {below}
+                ORDER BY timestamp
+            """)
+            conn.execute("INSERT INTO meta (key, value) VALUES ('alerts_backfilled', '1')")
+
+    def _upsert_product(self, conn, row):
+        # Failed selectors come back as 'N/A'; don't let them overwrite a good name/brand
+        product_key, url = canonicalize(row.get('url'))
+        conn.execute(
+            """
+            INSERT INTO products (url, site, name, brand, threshold, product_key) VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(product_key) DO UPDATE SET
+                site = excluded.site,
+                name = COALESCE(NULLIF(excluded.name, 'N/A'), products.name),
+                brand = COALESCE(NULLIF(excluded.brand, 'N/A'), products.brand),
+                threshold = COALESCE(excluded.threshold, products.threshold)
+            """,
+            (url, row.get('site'), row.get('name'), row.get('brand'),
+             _to_float(row.get('threshold')), product_key)
+        )
+        product = conn.execute("SELECT id, threshold FROM products WHERE product_key = ?", (product_key,)).fetchone()
+        return product['id'], product['threshold']
+
+
+class HistoryCache:
+    """Parsed, typed and de-duplicated observation history kept in memory.
+
+    The frame is rebuilt only when the database files change, and then only
+    observations whose revision moved on (new rows, or runs extended in
+    place) are read and cleaned."""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._signature = None
+        self._frame = None
+        self._products = None
+        self._last_id = 0
+        self._revision = 0
+        self._seen = set()
+
+    def load(self):
+        with self._lock:
+            signature = self.store.file_signature()
+            if self._frame is None or signature != self._signature:
+                self._refresh()
+                self._signature = signature
+            return self._frame
+
+    def _refresh(self):
+        import pandas as pd
+
+        conn = self.store.connect()
+        products = pd.read_sql_query(
+            "SELECT id AS product_id, site, name, brand, url, product_key FROM products ORDER BY id", conn
+        )
+        max_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM observations").fetchone()[0]
+
+        # Renamed products or a shrunken table invalidate what we have cached
+        full = (self._frame is None or max_id < self._last_id
+                or not products.equals(self._products))
+        if full:
+            self._last_id = 0
+            self._revision = -1
+            self._seen = set()
+
+        rows = pd.read_sql_query(
+            """
+            SELECT id, product_id, timestamp, price, rating, threshold,
+                   COALESCE(last_seen, timestamp) AS last_seen, seen_count, revision
+            FROM observations WHERE revision > ? ORDER BY id
+            """,
+            conn, params=(self._revision,)
+        )
+        self._products = products
+
+        # Rows we already hold only had their run extended: patch them in place
+        updated = rows[rows['id'] <= self._last_id]
+        rows = rows[rows['id'] > self._last_id]
+        if not rows.empty:
+            self._last_id = int(rows['id'].max())
+        if not updated.empty or not rows.empty:
+            self._revision = max(self._revision, int(pd.concat([updated, rows])['revision'].max()))
+
+        frame = self._frame
+        if not full and not updated.empty and not frame.empty:
+            updated = updated.set_index('id')
+            hit = frame['observation_id'].isin(updated.index)
+            if hit.any():
+                frame = frame.copy()   # callers may still hold the old frame
+                ids = frame.loc[hit, 'observation_id']
+                frame.loc[hit, 'last_seen'] = pd.to_datetime(ids.map(updated['last_seen']), errors='coerce')
+                frame.loc[hit, 'seen_count'] = ids.map(updated['seen_count'])
+
+        new = self._clean(rows, products)
+        keys = list(zip(new['product_id'], new['timestamp'], new['price']))
+        keep = [key not in self._seen for key in keys]
+        new = new[keep]
+        self._seen.update(keys)
+
+        if full or frame.empty:
+            self._frame = new.sort_values('timestamp', kind='stable').reset_index(drop=True)
+        elif not new.empty:
+            frame = pd.concat([frame, new], ignore_index=True)
+            if new['timestamp'].min() < self._frame['timestamp'].max():
+                frame = frame.sort_values('timestamp', kind='stable').reset_index(drop=True)
+            self._frame = frame
+        else:
+            self._frame = frame
+
+    @staticmethod
+    def _clean(rows, products):
+        import pandas as pd
+
+        df = rows.rename(columns={'id': 'observation_id'}).merge(products, on='product_id', how='left')
+        df['price'] = pd.to_numeric(df['price'], errors='coerce')
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+        df['last_seen'] = pd.to_datetime(df['last_seen'], errors='coerce')
+        df = df.dropna(subset=['name', 'price', 'timestamp'])
+        df = df.drop_duplicates(subset=['product_id', 'timestamp', 'price'])
+        return df[COLUMNS + ['product_id', 'product_key', 'observation_id', 'last_seen', 'seen_count']]
+
+
+def _encode_cursor(value, row_id):
+    return base64.urlsafe_b64encode(json.dumps([value, row_id]).encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return value, int(row_id)
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def _rollup_bucket(resolution, when):
+    # Bucket label: the day itself, or the Monday starting its week
+    day = when.date()
+    if resolution == 'week':
+        day -= timedelta(days=day.weekday())
+    return day.isoformat()
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _is_price(value):
+    return value is not None and value > 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """Process-wide store, migrating price_data.csv on first use"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = PriceStore()
+        return _store
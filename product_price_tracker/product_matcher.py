@@ -0,0 +1,115 @@
+# product_matcher.py
+
+import math
+import re
+
+# Candidates are the same product when most of the shorter title's tokens appear
+# in the longer one and the prices are within PRICE_TOLERANCE of each other.
+SIMILARITY = 0.8
+PRICE_TOLERANCE = 0.10
+
+STOPWORDS = {'a', 'an', 'and', 'the', 'with', 'for', 'of', 'in', 'on', 'by', 'to', 'pack', 'combo'}
+
+
+def title_tokens(name):
+    """Lowercase word and number tokens; "128GB" and "128 GB" both give {"128", "gb"}"""
+    tokens = re.findall(r'[a-z]+|\d+(?:\.\d+)?', (name or '').lower())
+    return frozenset(token for token in tokens if token not in STOPWORDS)
+
+
+def price_bucket(price, tolerance=PRICE_TOLERANCE):
+    """Log-scale bucket; unknown prices share bucket -1.
+
+    Prices within tolerance of each other (|p - q| <= tolerance * max(p, q))
+    differ by at most -log(1 - tolerance) in log space, so buckets that wide
+    put every such pair in the same or adjacent buckets."""
+    if not price or price <= 0:
+        return -1
+    width = -math.log(1 - tolerance) * (1 + 1e-9)   # a hair wider for rounding at the edge
+    return int(math.log(price) / width)
+
+
+def prefix_size(count, similarity=SIMILARITY):
+    """How many of a title's tokens are enough to be sure of hitting a longer title
+    that contains `similarity` of them: with k of n tokens required, any n - k + 1 do"""
+    required = math.ceil(similarity * count - 1e-9)
+    return count - max(required, 1) + 1
+
+
+class NearDuplicateMatcher:
+    """Incremental cross-platform duplicate detection over search results.
+
+    Matching is by containment, so a short Flipkart title can match a long
+    Amazon one. Each result is indexed under its few rarest tokens (its
+    prefix, see prefix_size) and under all of its tokens, per price bucket.
+    A new result probes the full index with its prefix, which finds earlier
+    longer titles, and the prefix index with all of its tokens, which finds
+    earlier shorter ones. It is only compared with the handful of results
+    those probes turn up (see `python benchmarks.py dedupe`)."""
+
+    def __init__(self, similarity=SIMILARITY, price_tolerance=PRICE_TOLERANCE):
+        self.similarity = similarity
+        self.price_tolerance = price_tolerance
+        self._items = []      # (tokens, number tokens, price) per kept result
+        self._by_token = {}   # (token, price bucket) -> indexes of kept results containing it
+        self._by_prefix = {}  # (token, price bucket) -> indexes of kept results with it in their prefix
+        self._seen = {}       # token -> results seen so far containing it, for picking prefixes
+        self.comparisons = 0
+
+    def add(self, result):
+        """Remember result and return True, or return False if it duplicates an earlier one"""
+        tokens = title_tokens(result.get("name"))
+        price = result.get("price") or 0.0
+        if not tokens:
+            return True
+
+        for token in tokens:
+            self._seen[token] = self._seen.get(token, 0) + 1
+        # Rarest first; numbers (models, capacities) break ties as they are the most telling
+        ranked = sorted(tokens, key=lambda token: (self._seen[token], not token[0].isdigit(), -len(token), token))
+        prefix = ranked[:prefix_size(len(tokens), self.similarity)]
+
+        bucket = price_bucket(price, self.price_tolerance)
+        neighbours = (bucket,) if bucket < 0 else (bucket - 1, bucket, bucket + 1)
+        numbers = _numbers(tokens)
+        candidates = set()
+        for neighbour in neighbours:
+            for token in prefix:
+                candidates.update(self._by_token.get((token, neighbour), ()))
+            for token in tokens:
+                candidates.update(self._by_prefix.get((token, neighbour), ()))
+        for index in sorted(candidates):
+            if self._same_product(tokens, numbers, price, *self._items[index]):
+                return False
+
+        index = len(self._items)
+        self._items.append((tokens, numbers, price))
+        for token in tokens:
+            self._by_token.setdefault((token, bucket), []).append(index)
+        for token in prefix:
+            self._by_prefix.setdefault((token, bucket), []).append(index)
+        return True
+
+    def _same_product(self, tokens, numbers, price, other_tokens, other_numbers, other_price):
+        self.comparisons += 1
+        if price or other_price:
+            if not (price and other_price):
+                return False
+            if abs(price - other_price) > self.price_tolerance * max(price, other_price):
+                return False
+
+        shorter, longer = sorted(((tokens, numbers), (other_tokens, other_numbers)), key=lambda t: len(t[0]))
+        # Model numbers, sizes and capacities have to agree: "128 GB" is not "256 GB"
+        if not shorter[1] <= longer[1]:
+            return False
+        return len(shorter[0] & longer[0]) >= self.similarity * len(shorter[0])
+
+
+def _numbers(tokens):
+    return frozenset(token for token in tokens if token[0].isdigit())
+
+
+def remove_near_duplicates(results):
+    """Results with near-duplicates of earlier results dropped, order preserved"""
+    matcher = NearDuplicateMatcher()
+    return [result for result in results if matcher.add(result)]
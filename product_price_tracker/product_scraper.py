@@ -1,275 +1,197 @@
 # product_scraper.py
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+import argparse
 import csv
-from datetime import datetime
-import re
-import time
+import json
+from price_store import get_store
+from site_adapters import adapter_for, canonicalize, get_adapter, supported_sites
 
-def get_amazon_data(url, threshold):
-    try:
-        # Set up headless Chrome browser
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--window-size=1920x1080')
-
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        time.sleep(3)  
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        name = soup.select_one('#productTitle')
-        price = soup.select_one('span.a-price > span.a-offscreen')
-        brand = soup.select_one('#bylineInfo')
-        rating = soup.select_one('span.a-icon-alt')
-
-        driver.quit()
-
-        return {
-            'site': 'Amazon',
-            'name': name.get_text(strip=True) if name else 'N/A',
-            'price': float(re.sub(r'[^\d.]', '', price.text)) if price else 0.0,
-            'brand': brand.get_text(strip=True) if brand else 'N/A',
-            'rating': rating.get_text(strip=True).split()[0] if rating else 'N/A',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'url': url,
-            'threshold': threshold
-        }
+BATCH_WORKERS = 8   # upper bound; each site's own concurrency cap applies inside it
 
-    except Exception as e:
-        print(f"Amazon Scraping Error: {e}")
+def scrape_product(url, threshold, adapter=None):
+    """Fetch and parse one product page with the adapter registered for its domain"""
+    adapter = adapter or adapter_for(url)
+    if adapter is None:
+        print(f"Unsupported site: {url} (supported: {', '.join(supported_sites())})")
         return None
 
-# Add the div and class selectors for Flipkart, Meesho, Croma, Shopsy, and Reliance Digital as per the latest website structure as they may change over time.   
-
-def get_flipkart_data(url, threshold):
     try:
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--window-size=1920x1080')
-
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        time.sleep(3)
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        name = soup.select_one('span.B_NuCI') or soup.select_one('span.VU-ZEz')
-        price = soup.select_one('div._30jeq3._16Jk6d') or soup.select_one('div.Nx9bqj.CxhGGd')
-        brand = soup.select_one('a._2whKao')  
-        rating = soup.select_one('div._3LWZlK') or soup.select_one('div.XQDdHH')
-
-
-        driver.quit()
-
-        return {
-            'site': 'Flipkart',
-            'name': name.get_text(strip=True) if name else 'N/A',
-            'price': float(re.sub(r'[^\d.]', '', price.text)) if price else 0.0,
-            'brand': brand.get_text(strip=True) if brand else 'N/A',
-            'rating': rating.get_text(strip=True) if rating else 'N/A',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'url': url,
-            'threshold': threshold
-        }
+        soup = adapter.fetch(url)
+        return adapter.parse(soup, url, threshold)
 
     except Exception as e:
-        print(f"Flipkart Scraping Error: {e}")
+        print(f"{adapter.site} Scraping Error: {e}")
         return None
 
+# Per-site entry points kept for existing callers; selectors live in site_adapters.py
 
+def get_amazon_data(url, threshold):
+    return scrape_product(url, threshold, get_adapter('Amazon'))
 
-def get_meesho_data(url, threshold):
-    try:
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--window-size=1920x1080')
-
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        time.sleep(3)
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        name = soup.select_one('h1.ProductDetails__title')
-        price = soup.select_one('span.ProductDetails__price-value')
-        brand = soup.select_one('div.ProductDetails__brand-name')
-        rating = soup.select_one('div.Ratings__rating')
-
-        driver.quit()
-
-        return {
-            'site': 'Meesho',
-            'name': name.get_text(strip=True) if name else 'N/A',
-            'price': float(re.sub(r'[^\d.]', '', price.text)) if price else 0.0,
-            'brand': brand.get_text(strip=True) if brand else 'N/A',
-            'rating': rating.get_text(strip=True) if rating else 'N/A',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'url': url,
-            'threshold': threshold
-        }
-
-    except Exception as e:
-        print(f"Meesho Scraping Error: {e}")
-        return None
+def get_flipkart_data(url, threshold):
+    return scrape_product(url, threshold, get_adapter('Flipkart'))
 
+def get_meesho_data(url, threshold):
+    return scrape_product(url, threshold, get_adapter('Meesho'))
 
 def get_croma_data(url, threshold):
-    try:
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--window-size=1920x1080')
-
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        time.sleep(3)
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        name = soup.select_one('h1.pdp-title')
-        price = soup.select_one('span.amount')
-        brand = soup.select_one('div.product-brand > a')
-        rating = soup.select_one('span.bv_avgRating_component_container')
-
-        driver.quit()
-
-        return {
-            'site': 'Croma',
-            'name': name.get_text(strip=True) if name else 'N/A',
-            'price': float(re.sub(r'[^\d.]', '', price.text)) if price else 0.0,
-            'brand': brand.get_text(strip=True) if brand else 'N/A',
-            'rating': rating.get_text(strip=True) if rating else 'N/A',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'url': url,
-            'threshold': threshold
-        }
-
-    except Exception as e:
-        print(f"Croma Scraping Error: {e}")
-        return None
+    return scrape_product(url, threshold, get_adapter('Croma'))
 
 def get_shopsy_data(url, threshold):
-    try:
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--window-size=1920x1080')
-
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        time.sleep(3)
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        name = soup.select_one('span._2BULo')  
-        price = soup.select_one('div._30jeq3') 
-        brand = soup.select_one('span.G6XhRU')  
-        rating = soup.select_one('div._3LWZlK')  
-
-        driver.quit()
-
-        return {
-            'site': 'Shopsy',
-            'name': name.get_text(strip=True) if name else 'N/A',
-            'price': float(re.sub(r'[^\d.]', '', price.text)) if price else 0.0,
-            'brand': brand.get_text(strip=True) if brand else 'N/A',
-            'rating': rating.get_text(strip=True) if rating else 'N/A',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'url': url,
-            'threshold': threshold
-        }
-
-    except Exception as e:
-        print(f"Shopsy Scraping Error: {e}")
-        return None
+    return scrape_product(url, threshold, get_adapter('Shopsy'))
 
 def get_reliance_data(url, threshold):
-    try:
-        options = Options()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--window-size=1920x1080')
-
-        driver = webdriver.Chrome(options=options)
-        driver.get(url)
-        time.sleep(4)
-
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-
-        name = soup.select_one('h1.pdp__title')
-        price = soup.select_one('span.pdp__offerPrice') or soup.select_one('span.pdp__price')
-        brand = soup.select_one('div.pdp__brand-name')
-        rating = soup.select_one('div.ReviewModule__reviewScore')  
-
-        driver.quit()
-
-        return {
-            'site': 'Reliance Digital',
-            'name': name.get_text(strip=True) if name else 'N/A',
-            'price': float(re.sub(r'[^\d.]', '', price.text)) if price else 0.0,
-            'brand': brand.get_text(strip=True) if brand else 'N/A',
-            'rating': rating.get_text(strip=True) if rating else 'N/A',
-            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'url': url,
-            'threshold': threshold
-        }
+    return scrape_product(url, threshold, get_adapter('Reliance Digital'))
 
-    except Exception as e:
-        print(f"Reliance Digital Scraping Error: {e}")
-        return None
 
-
-
-def save_to_csv(data, file='price_data.csv'):
-    header = ['timestamp', 'site', 'name', 'price', 'brand', 'rating', 'url', 'threshold']
+def save_to_csv(data, store=None):
+    """Persist a scraped row; kept under its old name, rows now go to the SQLite price store"""
     try:
-        with open(file, 'a', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=header)
-            if f.tell() == 0:
-                writer.writeheader()
-            writer.writerow(data)
+        (store or get_store()).add_observation(data)
     except Exception as e:
-        print(f"CSV Save Error: {e}")
+        print(f"Price Store Save Error: {e}")
 
 def track_product(url, threshold):
-    if "amazon" in url:
-        data = get_amazon_data(url, threshold)
-    elif "flipkart" in url:
-        data = get_flipkart_data(url, threshold)
-    elif "meesho" in url:
-        data = get_meesho_data(url, threshold)
-    elif "croma" in url:
-        data = get_croma_data(url, threshold)
-    elif "shopsy" in url:
-        data = get_shopsy_data(url, threshold)
-    elif "reliancedigital" in url:
-        data = get_reliance_data(url, threshold)
-    else:
-        print("Only Amazon scraping is supported currently.")
-        return
+    adapter = adapter_for(url)
+    if adapter is None:
+        print(f"Unsupported site: {url} (supported: {', '.join(supported_sites())})")
+        return None
+
+    # Scrape the tracking-free URL so every variant of a link is one product
+    url = canonicalize(url)[1]
+    with adapter.throttle():
+        data = scrape_product(url, threshold, adapter)
 
     if data:
+        # The price store's alert engine reports a deal as the row is written
         save_to_csv(data)
-        print(" Product data saved to CSV.")
-        if data['price'] < threshold:
-            print(f" Deal Alert! '{data['name']}' is now ₹{data['price']} (Below ₹{threshold})")
+        print(" Product data saved to price store.")
     else:
         print("Failed to scrape the product.")
 
+    return data
+
+def track_products(items, workers=BATCH_WORKERS, store=None, cancel=None):
+    """
+    Scrape many products concurrently and save them in one bulk write
+    
+    Args:
+        items: {url: threshold} or an iterable of (url, threshold) pairs; a None
+            threshold keeps the one already stored for the product
+        workers (int): Scrapes in flight overall; each site's adapter caps its own share
+        store: Price store to write to (defaults to the shared one)
+        cancel: Optional threading.Event; once set, queued URLs are skipped
+    
+    Returns:
+        list: One outcome dict per URL in input order, with "status" of
+        "ok", "failed", "unsupported" or "cancelled", the scraped "data" and
+        the "product_key"; URLs naming the same product are scraped once and
+        share an outcome
+    """
+    if isinstance(items, dict):
+        items = items.items()
+    items = [(url, None if threshold is None else float(threshold)) for url, threshold in items]
+
+    def run(url, threshold, adapter):
+        if adapter is None:
+            return {"url": url, "site": None, "status": "unsupported", "data": None}
+        if cancel is not None and cancel.is_set():
+            return {"url": url, "site": adapter.site, "status": "cancelled", "data": None}
+
+        with adapter.throttle(cancel) as allowed:
+            if not allowed:
+                return {"url": url, "site": adapter.site, "status": "cancelled", "data": None}
+            data = scrape_product(url, threshold, adapter)
+        return {"url": url, "site": adapter.site, "status": "ok" if data else "failed", "data": data}
+
+    # Interleave sites so one slow, rate-limited site doesn't hold every worker
+    keys = []
+    by_site = {}
+    queued = set()
+    for url, threshold in items:
+        product_key, canonical_url = canonicalize(url)
+        if product_key not in queued:
+            queued.add(product_key)
+            adapter = adapter_for(url)
+            by_site.setdefault(adapter.site if adapter else None, []).append(
+                (product_key, canonical_url, threshold, adapter))
+        keys.append(product_key)
+    order = [job for group in _round_robin(list(by_site.values())) for job in group]
+
+    scraped = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="track") as executor:
+        futures = [(product_key, url, executor.submit(run, url, threshold, adapter))
+                   for product_key, url, threshold, adapter in order]
+        for product_key, url, future in futures:
+            try:
+                scraped[product_key] = future.result()
+            except Exception as e:
+                print(f"Tracking failed for {url}: {e}")
+                scraped[product_key] = {"url": url, "site": None, "status": "failed", "data": None}
+
+    outcomes = [dict(scraped[product_key], url=url, product_key=product_key)
+                for (url, _), product_key in zip(items, keys)]
+
+    rows = [outcome["data"] for outcome in scraped.values() if outcome["status"] == "ok"]
+    if rows:
+        try:
+            (store or get_store()).add_observations(rows)
+        except Exception as e:
+            print(f"Price Store Save Error: {e}")
+            for outcome in outcomes:
+                if outcome["status"] == "ok":
+                    outcome["status"] = "failed"
+            rows = []
+
+    if len(scraped) > 1:
+        print(f" Tracked {len(rows)}/{len(scraped)} products in one batch.")
+    return outcomes
+
+def _round_robin(groups):
+    # [[a1, a2], [b1]] -> [a1], [b1], [a2]
+    longest = max((len(group) for group in groups), default=0)
+    for i in range(longest):
+        yield [group[i] for group in groups if i < len(group)]
+
+def read_items(path):
+    """(url, threshold) pairs from a CSV with url,threshold columns or a plain list of URLs"""
+    items = []
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if not row or not row[0].strip() or row[0].strip().lower() == 'url':
+                continue
+            threshold = float(row[1]) if len(row) > 1 and row[1].strip() else None
+            items.append((row[0].strip(), threshold))
+    return items
+
 
 if __name__ == "__main__":
-    url = input("Enter Amazon product URL: ")
-    threshold = float(input("Enter threshold price: "))
-    track_product(url, threshold)
+    parser = argparse.ArgumentParser(description="Track product prices")
+    parser.add_argument("urls", nargs="*", help="product URLs to track")
+    parser.add_argument("--threshold", type=float, default=None,
+                        help="alert threshold for URLs given on the command line (default: keep the stored one)")
+    parser.add_argument("--file", help="CSV of url,threshold rows (or one URL per line)")
+    parser.add_argument("--tracked", action="store_true", help="re-track every product already in the price store")
+    parser.add_argument("--workers", type=int, default=BATCH_WORKERS)
+    parser.add_argument("--json", action="store_true", help="print outcomes as JSON")
+    args = parser.parse_args()
+
+    items = [(url, args.threshold) for url in args.urls]
+    if args.file:
+        items += read_items(args.file)
+    if args.tracked:
+        items += list(get_store().tracked_products().items())
+
+    if not items:
+        url = input("Enter product URL: ")
+        threshold = float(input("Enter threshold price: "))
+        track_product(url, threshold)
+    else:
+        outcomes = track_products(items, workers=args.workers)
+        if args.json:
+            print(json.dumps(outcomes, indent=2))
+        else:
+            for outcome in outcomes:
+                price = f" ₹{outcome['data']['price']}" if outcome["data"] else ""
+                print(f"{outcome['status']:<12} [{outcome['site'] or '-'}] {outcome['url']}{price}")
@@ -0,0 +1,145 @@
+# refresh_scheduler.py
+
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import random
+import threading
+import time
+
+REFRESH_INTERVAL = 6 * 60 * 60   # seconds between refresh rounds
+INITIAL_DELAY = 60               # let the app finish starting before the first round
+WORKERS = 4                      # per-site concurrency and rate limits live on the site adapters
+JITTER = 5                       # max random seconds before each scrape
+MAX_BACKOFF = 24 * 60 * 60
+
+
+class PriceRefreshScheduler:
+    """Periodically re-tracks every distinct URL in the price store.
+
+    Each URL is scraped and written on its own, so prices and alerts land as
+    the round progresses and a shutdown mid-round keeps what was scraped."""
+
+    def __init__(self, store, interval=REFRESH_INTERVAL, workers=WORKERS, jitter=JITTER,
+                 initial_delay=INITIAL_DELAY):
+        self.store = store
+        self.interval = interval
+        self.workers = workers
+        self.jitter = jitter
+        self.initial_delay = initial_delay
+
+        self._executor = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._in_flight = set()
+        self._failures = {}       # url -> (consecutive failures, retry-not-before)
+        self._completed = deque() # completion times for the throughput window
+        self._stats = {"rounds": 0, "succeeded": 0, "failed": 0, "last_round_at": None}
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="refresh")
+        self._thread = threading.Thread(target=self._run, name="price-refresh", daemon=True)
+        self._thread.start()
+        print(f"Price refresh scheduler started (every {self.interval}s, {self.workers} workers)")
+
+    def stop(self):
+        self._stop.set()
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def run_once(self):
+        """Queue every URL that is not already running or backing off"""
+        now = time.time()
+        items = []
+        with self._lock:
+            for url, threshold in self.store.tracked_products().items():
+                if url in self._in_flight:
+                    continue
+                failures, retry_at = self._failures.get(url, (0, 0))
+                if retry_at > now:
+                    continue
+                self._in_flight.add(url)
+                items.append((url, threshold))
+        # Interleave sites so workers don't all queue on one site's concurrency cap
+        from product_scraper import _round_robin
+        from site_adapters import adapter_for
+
+        by_site = {}
+        for url, threshold in items:
+            adapter = adapter_for(url)
+            by_site.setdefault(adapter.site if adapter else None, []).append((url, threshold))
+        for group in _round_robin(list(by_site.values())):
+            for url, threshold in group:
+                self._executor.submit(self._refresh, url, threshold)
+        queued = len(items)
+
+        with self._lock:
+            self._stats["rounds"] += 1
+            self._stats["last_round_at"] = time.strftime('%Y-%m-%d %H:%M:%S')
+        print(f"Price refresh round queued {queued} products")
+        return queued
+
+    def stats(self):
+        """Queue depth and throughput for the status endpoint"""
+        with self._lock:
+            self._trim_window(time.time())
+            return {
+                "running": bool(self._thread and self._thread.is_alive()),
+                "queue_depth": len(self._in_flight),
+                "backing_off": sum(1 for _, retry_at in self._failures.values() if retry_at > time.time()),
+                "throughput_per_min": round(len(self._completed) / 10, 2),
+                **self._stats,
+            }
+
+    def _run(self):
+        if self._stop.wait(self.initial_delay):
+            return
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Price refresh round failed: {e}")
+            if self._stop.wait(self.interval):
+                return
+
+    def _refresh(self, url, threshold):
+        from product_scraper import track_products
+
+        status = "failed"
+        try:
+            # Spread requests out so a round doesn't hit each site in lockstep
+            if self._stop.wait(random.uniform(0, self.jitter)):
+                status = "cancelled"
+                return
+            outcome = track_products([(url, threshold)], workers=1, store=self.store, cancel=self._stop)[0]
+            status = outcome["status"]
+        except Exception as e:
+            print(f"Refresh failed for {url}: {e}")
+        finally:
+            self._finish(url, status)
+
+    def _finish(self, url, status):
+        now = time.time()
+        with self._lock:
+            self._in_flight.discard(url)
+            if status == "cancelled":
+                return
+            if status == "ok":
+                self._failures.pop(url, None)
+                self._stats["succeeded"] += 1
+            else:
+                failures = self._failures.get(url, (0, 0))[0] + 1
+                # A single failure is retried next round; repeats sit out 1, 2, 4... rounds
+                backoff = 0 if failures == 1 else min(self.interval * 2 ** (failures - 2), MAX_BACKOFF)
+                self._failures[url] = (failures, now + backoff)
+                self._stats["failed"] += 1
+            self._completed.append(now)
+            self._trim_window(now)
+
+    def _trim_window(self, now):
+        # Throughput is measured over the last ten minutes
+        while self._completed and self._completed[0] < now - 600:
+            self._completed.popleft()
@@ -1,55 +1,96 @@
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium import webdriver
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
+from driver_pool import get_pool
+from fetcher import wait_until_ready
+from search_cache import SearchCache
+from product_matcher import NearDuplicateMatcher, remove_near_duplicates
 import time
-import random
 import re
 from urllib.parse import quote_plus
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+import queue
+
+# Seconds to wait for each platform before returning whatever has finished
+PLATFORM_DEADLINE = 30
+
+# Platform searches run here so a slow site never delays the others
+_search_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="search")
+
+# Recent search results, keyed on normalised query and price range
+_search_cache = SearchCache()
+
+MAX_RESULTS_PER_SITE = 20
+
+
+class SearchFailed(Exception):
+    """A platform search was blocked, timed out or broke, as opposed to finding nothing.
+
+    `results` holds whatever was parsed before it failed."""
+
+    def __init__(self, message, results=()):
+        super().__init__(message)
+        self.results = list(results)
+
+
+# Selector plans for bulk card extraction: the first item selector that matches
+# anything wins, and for each field the first selector yielding a non-empty value
+# wins. "text" reads the rendered text (falling back to textContent for hidden
+# nodes); anything else is read as a DOM property such as href or src.
+AMAZON_ITEM_SELECTORS = [
+    "div[data-component-type='s-search-result']",
+    "div.s-result-item[data-component-type='s-search-result']",
+    "div.s-main-slot > div.s-result-item"
+]
+
+AMAZON_CARD_FIELDS = {
+    "name": [["h2 a span", "text"], ["h2.a-size-mini span", "text"],
+             [".s-size-mini .s-link-style a span", "text"], ["h2 span", "text"]],
+    "price": [[".a-price-whole", "text"], [".a-offscreen", "text"],
+              [".a-price .a-offscreen", "text"], [".a-price-range .a-offscreen", "text"]],
+    "link": [["h2 a", "href"], ["a.a-link-normal", "href"]],
+    "image": [["img.s-image", "src"], [".s-product-image-container img", "src"]],
+    "rating": [[".a-icon-alt", "textContent"]],
+}
+
+FLIPKART_ITEM_SELECTORS = ["div._1AtVbE"]
+
+FLIPKART_CARD_FIELDS = {
+    "name": [["div._4rR01T", "text"], ["a.s1Q9rs", "text"]],   # Laptop/TV, then mobile layout
+    "price": [["div._30jeq3._1_WHN1", "text"]],
+    "link": [["a", "href"]],
+    "image": [["img._396cs4", "src"], ["img._2r_T1I", "src"]],
+    "rating": [["div._3LWZlK", "text"]],
+}
+
+EXTRACT_CARDS_JS = """
+const [itemSelectors, fields, limit] = arguments;
+let items = [];
+for (const selector of itemSelectors) {
+    items = document.querySelectorAll(selector);
+    if (items.length) break;
+}
+const read = (el, attr) => {
+    let value = attr === 'text' ? (el.innerText || el.textContent) : el[attr];
+    if (value === undefined || value === null) value = el.getAttribute(attr);
+    return value ? String(value).trim() : '';
+};
+return Array.from(items).slice(0, limit).map(item => {
+    const card = {};
+    for (const [field, plan] of Object.entries(fields)) {
+        card[field] = null;
+        for (const [selector, attr] of plan) {
+            const el = item.querySelector(selector);
+            const value = el ? read(el, attr) : '';
+            if (value) { card[field] = value; break; }
+        }
+    }
+    return card;
+});
+"""
 
 class ProductScraper:
     def __init__(self, headless=True):
         self.headless = headless
-        self.driver = None
         
-    def setup_driver(self):
-        """Setup Chrome driver with optimized options"""
-        options = Options()
-        
-        if self.headless:
-            options.add_argument("--headless")
-        
-        # Performance and stealth options
-        options.add_argument("--disable-gpu")
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        options.add_experimental_option('useAutomationExtension', False)
-        
-        # Rotate user agents
-        user_agents = [
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-            "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
-        ]
-        options.add_argument(f"user-agent={random.choice(user_agents)}")
-        
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=options)
-        
-        # Execute script to remove webdriver property
-        driver.execute_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
-        
-        return driver
-    
-    def random_delay(self, min_delay=1, max_delay=3):
-        """Add random delay to avoid detection"""
-        time.sleep(random.uniform(min_delay, max_delay))
-    
     def extract_price(self, price_text):
         """Extract numeric price from text"""
         if not price_text:
@@ -65,10 +106,20 @@ class ProductScraper:
             return float(price_match.group(1))
         return 0.0
     
-    def search_amazon(self, product_name, min_price=None, max_price=None):
-        """Search Amazon with price filters"""
-        self.driver = self.setup_driver()
+    def extract_cards(self, driver, item_selectors, fields, limit=MAX_RESULTS_PER_SITE):
+        """Every result card's raw field values from a single execute_script round-trip.
+        
+        Returns a list of {field: str or None} dicts, one per card, in page order."""
+        return driver.execute_script(EXTRACT_CARDS_JS, item_selectors, fields, limit) or []
+    
+    def search_amazon(self, product_name, min_price=None, max_price=None, on_result=None):
+        """Search Amazon with price filters; on_result is called with each product as it is parsed.
+        
+        Raises SearchFailed if the results page never loaded or the search broke."""
+        pool = get_pool(self.headless)
+        driver = pool.checkout()
         results = []
+        failure = None
         
         try:
             # Build URL with price filters
@@ -93,128 +144,51 @@ class ProductScraper:
                 url += f"&rh=p_36:{price_range}"
             
             print(f"Searching Amazon: {url}")
-            self.driver.get(url)
-            self.random_delay(2, 4)
+            driver.get(url)
             
             # Wait for results to load
-            wait = WebDriverWait(self.driver, 15)
-            wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, "div[data-component-type='s-search-result']")))
-            
-            # Multiple selectors for different Amazon layouts
-            item_selectors = [
-                "div[data-component-type='s-search-result']",
-                "div.s-result-item[data-component-type='s-search-result']",
-                "div.s-main-slot > div.s-result-item"
-            ]
+            ready = wait_until_ready(driver, ["div[data-component-type='s-search-result']"], "Amazon search")
             
-            items = []
-            for selector in item_selectors:
-                items = self.driver.find_elements(By.CSS_SELECTOR, selector)
-                if items:
-                    break
+            cards = self.extract_cards(driver, AMAZON_ITEM_SELECTORS, AMAZON_CARD_FIELDS)
+            if not cards and not ready:
+                raise RuntimeError("results page did not load (blocked or timed out)")
+            print(f"Found {len(cards)} items on Amazon")
             
-            print(f"Found {len(items)} items on Amazon")
-            
-            for item in items[:20]:  # Limit to first 20 items
+            for card in cards:
                 try:
-                    # Product name - multiple selectors
-                    name = None
-                    name_selectors = [
-                        "h2 a span",
-                        "h2.a-size-mini span",
-                        ".s-size-mini .s-link-style a span",
-                        "h2 span"
-                    ]
-                    
-                    for selector in name_selectors:
-                        try:
-                            name_elem = item.find_element(By.CSS_SELECTOR, selector)
-                            name = name_elem.text.strip()
-                            if name:
-                                break
-                        except:
-                            continue
-                    
+                    name = card["name"]
                     if not name:
                         continue
                     
-                    # Price - multiple selectors
-                    price = 0.0
-                    price_selectors = [
-                        ".a-price-whole",
-                        ".a-offscreen",
-                        ".a-price .a-offscreen",
-                        ".a-price-range .a-offscreen"
-                    ]
-                    
-                    for selector in price_selectors:
-                        try:
-                            price_elem = item.find_element(By.CSS_SELECTOR, selector)
-                            price_text = price_elem.text or price_elem.get_attribute("textContent")
-                            price = self.extract_price(price_text)
-                            if price > 0:
-                                break
-                        except:
-                            continue
+                    price = self.extract_price(card["price"])
                     
                     # Product link
                     link = None
-                    try:
-                        link_elem = None
-                        try:
-                            link_elem = item.find_element(By.CSS_SELECTOR, "h2 a")
-                        except:
-                            try:
-                                link_elem = item.find_element(By.CSS_SELECTOR, "a.a-link-normal")
-                            except:
-                                pass
-
-                        if link_elem:
-                            link_raw = link_elem.get_attribute("href")
-                            if link_raw:
-                                link_raw = link_raw.strip()
-                                if link_raw.startswith("/"):
-                                    link = "https://www.amazon.in" + link_raw
-                                elif link_raw.startswith("http"):
-                                    link = link_raw
-
-                        print(f"Amazon product link: {link}")  # Debug output
-                    except Exception as e:
-                        print(f"Error getting Amazon link: {e}")
-
-                    
-                    # Product image
-                    image = None
-                    try:
-                        img_elem = item.find_element(By.CSS_SELECTOR, "img.s-image")
-                        image = img_elem.get_attribute("src")
-                    except:
-                        try:
-                            img_elem = item.find_element(By.CSS_SELECTOR, ".s-product-image-container img")
-                            image = img_elem.get_attribute("src")
-                        except:
-                            pass
+                    link_raw = card["link"]
+                    if link_raw:
+                        if link_raw.startswith("/"):
+                            link = "https://www.amazon.in" + link_raw
+                        elif link_raw.startswith("http"):
+                            link = link_raw
                     
                     # Rating (optional)
                     rating = None
-                    try:
-                        rating_elem = item.find_element(By.CSS_SELECTOR, ".a-icon-alt")
-                        rating_text = rating_elem.get_attribute("textContent")
-                        rating_match = re.search(r'(\d+\.?\d*)', rating_text)
-                        if rating_match:
-                            rating = float(rating_match.group(1))
-                    except:
-                        pass
+                    rating_match = re.search(r'(\d+\.?\d*)', card["rating"] or "")
+                    if rating_match:
+                        rating = float(rating_match.group(1))
                     
                     if name and (price > 0 or link):
-                        results.append({
+                        result = {
                             "name": name,
                             "price": price,
                             "product_url": link or "",
-                            "image": image or "",
+                            "image": card["image"] or "",
                             "rating": rating,
                             "source": "Amazon"
-                        })
+                        }
+                        results.append(result)
+                        if on_result:
+                            on_result(result)
                         
                 except Exception as e:
                     print(f"Error processing Amazon item: {e}")
@@ -222,17 +196,23 @@ class ProductScraper:
         
         except Exception as e:
             print(f"Error searching Amazon: {e}")
+            failure = e
         
         finally:
-            if self.driver:
-                self.driver.quit()
+            pool.checkin(driver)
         
+        if failure is not None:
+            raise SearchFailed(f"Amazon search failed: {failure}", results)
         return results
     
-    def search_flipkart(self, product_name, min_price=None, max_price=None):
-        """Search Flipkart with price filters"""
-        self.driver = self.setup_driver()
+    def search_flipkart(self, product_name, min_price=None, max_price=None, on_result=None):
+        """Search Flipkart with price filters; on_result is called with each product as it is parsed.
+        
+        Raises SearchFailed if the results page never loaded or the search broke."""
+        pool = get_pool(self.headless)
+        driver = pool.checkout()
         results = []
+        failure = None
         
         try:
             query = quote_plus(product_name)
@@ -248,89 +228,57 @@ class ProductScraper:
                 url += "&" + "&".join(price_filter)
             
             print(f"Searching Flipkart: {url}")
-            self.driver.get(url)
+            driver.get(url)
+
+            # Wait for product listings and their prices
+            ready = wait_until_ready(driver, ["div._1AtVbE", "div._1AtVbE div._30jeq3"], "Flipkart search")
 
-            # Close login popup if it appears
+            # Close login popup if it appeared (the page is loaded, so no need to wait for it)
             try:
-                WebDriverWait(self.driver, 3).until(
-                    EC.element_to_be_clickable((By.CSS_SELECTOR, "button._2KpZ6l._2doB4z"))
-                ).click()
-                print("Closed login popup")
+                popups = driver.find_elements(By.CSS_SELECTOR, "button._2KpZ6l._2doB4z")
+                if popups:
+                    popups[0].click()
+                    print("Closed login popup")
             except:
                 pass
 
-            # Wait for product listings
-            wait = WebDriverWait(self.driver, 15)
-            wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "div._1AtVbE")))
+            cards = self.extract_cards(driver, FLIPKART_ITEM_SELECTORS, FLIPKART_CARD_FIELDS)
+            if not cards and not ready:
+                raise RuntimeError("results page did not load (blocked or timed out)")
 
-            time.sleep(2)  # Ensure all images and prices are loaded
+            print(f"Found {len(cards)} Flipkart elements")
 
-            items = self.driver.find_elements(By.CSS_SELECTOR, "div._1AtVbE")
-
-            print(f"Found {len(items)} Flipkart elements")
-
-            for item in items[:20]:  # Limit to 20 results
+            for card in cards:
                 try:
-                    # Product Name
-                    try:
-                        name_elem = item.find_element(By.CSS_SELECTOR, "div._4rR01T")  # Laptop/TV layout
-                        name = name_elem.text.strip()
-                    except:
-                        try:
-                            name_elem = item.find_element(By.CSS_SELECTOR, "a.s1Q9rs")  # Mobile layout
-                            name = name_elem.text.strip()
-                        except:
-                            continue
-                    
-                    # Price
-                    price = 0.0
-                    try:
-                        price_elem = item.find_element(By.CSS_SELECTOR, "div._30jeq3._1_WHN1")
-                        price = self.extract_price(price_elem.text)
-                    except:
-                        pass
+                    name = card["name"]
+                    if not name:
+                        continue
 
-                    # Link
-                    link = ""
-                    try:
-                        link_elem = item.find_element(By.TAG_NAME, "a")
-                        link_raw = link_elem.get_attribute("href")
-                        if link_raw.startswith("/"):
-                            link = "https://www.flipkart.com" + link_raw
-                        else:
-                            link = link_raw
-                    except:
-                        pass
+                    price = self.extract_price(card["price"])
 
-                    # Image
-                    image = ""
-                    try:
-                        img_elem = item.find_element(By.CSS_SELECTOR, "img._396cs4")
-                        image = img_elem.get_attribute("src")
-                    except:
-                        try:
-                            img_elem = item.find_element(By.CSS_SELECTOR, "img._2r_T1I")
-                            image = img_elem.get_attribute("src")
-                        except:
-                            pass
+                    link = card["link"] or ""
+                    if link.startswith("/"):
+                        link = "https://www.flipkart.com" + link
 
                     # Rating (optional)
                     rating = None
                     try:
-                        rating_elem = item.find_element(By.CSS_SELECTOR, "div._3LWZlK")
-                        rating = float(rating_elem.text)
-                    except:
+                        rating = float(card["rating"])
+                    except (TypeError, ValueError):
                         pass
 
                     if name and (price > 0 or link):
-                        results.append({
+                        result = {
                             "name": name,
                             "price": price,
                             "product_url": link or "",
-                            "image": image or "",
+                            "image": card["image"] or "",
                             "rating": rating,
                             "source": "Flipkart"
-                        })
+                        }
+                        results.append(result)
+                        if on_result:
+                            on_result(result)
 
                 except Exception as e:
                     print(f"Error processing Flipkart item: {e}")
@@ -338,80 +286,165 @@ class ProductScraper:
 
         except Exception as e:
             print(f"Error searching Flipkart: {e}")
+            failure = e
 
         finally:
-            if self.driver:
-                self.driver.quit()
+            pool.checkin(driver)
 
+        if failure is not None:
+            raise SearchFailed(f"Flipkart search failed: {failure}", results)
         return results
 
-    def search_all_platforms(self, product_name, min_price=None, max_price=None, sort_by="price"):
+    def search_all_platforms(self, product_name, min_price=None, max_price=None, sort_by="price", deadline=PLATFORM_DEADLINE):
         """Search all platforms and combine results"""
+        results = self.collect_results(product_name, min_price, max_price, deadline)
+        return self.sort_results(results, sort_by)
+    
+    def collect_results(self, product_name, min_price=None, max_price=None, deadline=PLATFORM_DEADLINE):
+        """Search all platforms concurrently and combine whatever finishes within the deadline"""
+        return self.collect_with_status(product_name, min_price, max_price, deadline)[0]
+    
+    def collect_with_status(self, product_name, min_price=None, max_price=None, deadline=PLATFORM_DEADLINE):
+        """(results, complete), where complete is False if any platform missed the
+        deadline or failed, so a partial answer is not mistaken for the full one"""
         all_results = []
+        complete = True
+        searches = {
+            "Amazon": self.search_amazon,
+            "Flipkart": self.search_flipkart,
+        }
         
-        # Search Amazon
-        try:
-            amazon_results = self.search_amazon(product_name, min_price, max_price)
-            for r in amazon_results:
-                if "product_url" not in r and "url" in r:
-                    r["product_url"] = r["url"]
-            all_results.extend(amazon_results)
-            print(f"Amazon returned {len(amazon_results)} results")
-        except Exception as e:
-            print(f"Error searching Amazon: {e}")
-        
-        self.random_delay(2, 4)  # Delay between platforms
+        futures = {
+            _search_executor.submit(search, product_name, min_price, max_price): platform
+            for platform, search in searches.items()
+        }
+        done, _ = wait_futures(futures, timeout=deadline)
         
-        # Search Flipkart
-        try:
-            flipkart_results = self.search_flipkart(product_name, min_price, max_price)
-            for r in flipkart_results:
+        for future, platform in futures.items():
+            if future not in done:
+                print(f"{platform} search missed the {deadline}s deadline, skipping")
+                complete = False
+                continue
+            try:
+                platform_results = future.result()
+                print(f"{platform} returned {len(platform_results)} results")
+            except SearchFailed as e:
+                # Keep what it found, but a blocked platform's silence isn't "no results"
+                platform_results = e.results
+                complete = False
+            except Exception as e:
+                print(f"Error searching {platform}: {e}")
+                complete = False
+                continue
+            for r in platform_results:
                 if "product_url" not in r and "url" in r:
                     r["product_url"] = r["url"]
-            all_results.extend(flipkart_results)
-            print(f"Flipkart returned {len(flipkart_results)} results")
-        except Exception as e:
-            print(f"Error searching Flipkart: {e}")
+            all_results.extend(platform_results)
         
         # Remove duplicates based on similar names and prices
-        unique_results = self.remove_duplicates(all_results)
+        return self.remove_duplicates(all_results), complete
+    
+    def stream_results(self, product_name, min_price=None, max_price=None, deadline=PLATFORM_DEADLINE):
+        """Yield ("product", result) as each platform parses each card, de-duplicating as
+        they arrive, then ("platform", summary) per finished platform and a final ("done", summary)"""
+        events = queue.Queue()
+        searches = {
+            "Amazon": self.search_amazon,
+            "Flipkart": self.search_flipkart,
+        }
+        
+        def run(platform, search):
+            try:
+                found = search(product_name, min_price, max_price,
+                               on_result=lambda r: events.put(("product", r)))
+                events.put(("platform", {"source": platform, "count": len(found)}))
+            except SearchFailed as e:
+                events.put(("platform", {"source": platform, "count": len(e.results), "error": str(e)}))
+            except Exception as e:
+                print(f"Error searching {platform}: {e}")
+                events.put(("platform", {"source": platform, "count": 0, "error": str(e)}))
+        
+        for platform, search in searches.items():
+            _search_executor.submit(run, platform, search)
+        
+        matcher = NearDuplicateMatcher()
+        pending = len(searches)
+        failed = 0
+        sent = 0
+        end = time.monotonic() + deadline
+        while pending:
+            try:
+                event, payload = events.get(timeout=max(0, end - time.monotonic()))
+            except queue.Empty:
+                print(f"Streaming search missed the {deadline}s deadline")
+                break
+            
+            if event == "product":
+                if not matcher.add(payload):
+                    continue
+                sent += 1
+            else:
+                pending -= 1
+                failed += "error" in payload
+            yield event, payload
+        
+        yield "done", {"count": sent, "complete": pending == 0 and not failed}
+    
+    @staticmethod
+    def sort_results(results, sort_by="price"):
+        """Sorted copy of the results; the input list and dicts are left untouched"""
+        results = [dict(r) for r in results]
         
-        # Sort results
         if sort_by == "price":
-            unique_results.sort(key=lambda x: x["price"])
+            results.sort(key=lambda x: x["price"])
         elif sort_by == "price_desc":
-            unique_results.sort(key=lambda x: x["price"], reverse=True)
-        elif sort_by == "rating" and any(r.get("rating") for r in unique_results):
-            unique_results.sort(key=lambda x: x.get("rating") or 0, reverse=True)
+            results.sort(key=lambda x: x["price"], reverse=True)
+        elif sort_by == "rating" and any(r.get("rating") for r in results):
+            results.sort(key=lambda x: x.get("rating") or 0, reverse=True)
         
-        return unique_results
+        return results
     
     def remove_duplicates(self, results):
-        """Remove duplicate products based on name similarity and price"""
-        unique_results = []
-        seen = set()
-        
-        for result in results:
-            # Create a simple signature for comparison
-            name_words = set(result["name"].lower().split()[:3])  # First 3 words
-            price_range = round(result["price"] / 100) * 100  # Round to nearest 100
-            signature = (frozenset(name_words), price_range)
-            
-            if signature not in seen:
-                seen.add(signature)
-                unique_results.append(result)
-        
-        return unique_results
+        """Drop results that are near-duplicates (same product, similar price) of earlier ones,
+        within and across platforms"""
+        return remove_near_duplicates(results)
 
 
 # Convenience functions for backward compatibility
 def search_amazon(product_name, min_price=None, max_price=None):
     scraper = ProductScraper()
-    return scraper.search_amazon(product_name, min_price, max_price)
+    try:
+        return scraper.search_amazon(product_name, min_price, max_price)
+    except SearchFailed as e:
+        return e.results
 
 def search_flipkart(product_name, min_price=None, max_price=None):
     scraper = ProductScraper()
-    return scraper.search_flipkart(product_name, min_price, max_price)
+    try:
+        return scraper.search_flipkart(product_name, min_price, max_price)
+    except SearchFailed as e:
+        return e.results
+
+def parse_price_range(price_range):
+    """(min_price, max_price) from "0-500", "5000+" or "all"; None means unbounded"""
+    min_price, max_price = None, None
+    if price_range != "all":
+        if "+" in price_range:
+            min_price = float(price_range.replace("+", ""))
+        elif "-" in price_range:
+            price_parts = price_range.split("-")
+            min_price = float(price_parts[0])
+            max_price = float(price_parts[1])
+    return min_price, max_price
+
+def _cache_key(product_name, min_price, max_price):
+    # Cached unsorted, so every sort_by variant of a query shares one entry
+    return (" ".join(product_name.lower().split()), min_price, max_price)
+
+def _is_complete(value):
+    # Only answers from every platform are cached; a partial one is returned once
+    results, complete = value
+    return complete and bool(results)
 
 def search_all_products(product_name, price_range="all", sort_by="price"):
     """
@@ -426,18 +459,47 @@ def search_all_products(product_name, price_range="all", sort_by="price"):
         list: Filtered and sorted product results
     """
     scraper = ProductScraper()
+    min_price, max_price = parse_price_range(price_range)
     
-    # Parse price range
-    min_price, max_price = None, None
-    if price_range != "all":
-        if "+" in price_range:
-            min_price = float(price_range.replace("+", ""))
-        elif "-" in price_range:
-            price_parts = price_range.split("-")
-            min_price = float(price_parts[0])
-            max_price = float(price_parts[1])
+    key = _cache_key(product_name, min_price, max_price)
+    results, _ = _search_cache.get_or_fetch(
+        key, lambda: scraper.collect_with_status(product_name, min_price, max_price),
+        cacheable=_is_complete
+    )
+    return scraper.sort_results(results, sort_by)
+
+def stream_all_products(product_name, price_range="all"):
+    """
+    Like search_all_products, but yields (event, payload) pairs as results arrive
+    
+    Events are "product" (one de-duplicated result), "platform" (a site finished)
+    and a final "done". A cached query is replayed at once (and refreshed in the
+    background if stale); a live one is cached when every platform finished in time.
+    """
+    min_price, max_price = parse_price_range(price_range)
+    key = _cache_key(product_name, min_price, max_price)
     
-    return scraper.search_all_platforms(product_name, min_price, max_price, sort_by)
+    cached = _search_cache.peek(
+        key, lambda: ProductScraper().collect_with_status(product_name, min_price, max_price),
+        cacheable=_is_complete
+    )
+    if cached is not None:
+        cached = cached[0]
+        for result in cached:
+            yield "product", result
+        yield "done", {"count": len(cached), "complete": True, "cached": True}
+        return
+    
+    scraper = ProductScraper()
+    results = []
+    for event, payload in scraper.stream_results(product_name, min_price, max_price):
+        if event == "product":
+            results.append(payload)
+        elif event == "done":
+            if payload["complete"] and results:
+                _search_cache.put(key, (results, True))
+            payload["cached"] = False
+        yield event, payload
 
 
 if __name__ == "__main__":
@@ -0,0 +1,106 @@
+# search_cache.py
+
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+import threading
+import time
+
+MAX_ENTRIES = 256
+TTL = 15 * 60          # seconds a result is served as fresh
+STALE_TTL = 60 * 60    # further seconds it is served while refreshing in the background
+
+
+class SearchCache:
+    """Size-bounded LRU cache with TTL expiry and stale-while-revalidate"""
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL, stale_ttl=STALE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self._entries = OrderedDict()   # key -> (stored_at, value)
+        self._inflight = {}             # key -> Future, so identical misses share one fetch
+        self._lock = threading.Lock()
+        self._refresher = ThreadPoolExecutor(max_workers=2, thread_name_prefix="search-refresh")
+
+    def get_or_fetch(self, key, fetch, cacheable=bool):
+        """Cached value for key, calling fetch() on a miss or in the background when stale.
+
+        A fetched value is only stored when cacheable(value) is true; otherwise it is
+        returned to the callers waiting on that fetch and any stale entry is kept."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                age = time.monotonic() - stored_at
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    if age >= self.ttl:
+                        self._revalidate(key, fetch, cacheable)
+                    return value
+                del self._entries[key]
+
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+
+        if owner:
+            return self._fetch(key, fetch, future, cacheable)
+        return future.result()
+
+    def peek(self, key, fetch=None, cacheable=bool):
+        """Fresh or stale value for key, or None; a miss is never fetched.
+
+        If the value is stale and fetch is given, it is refreshed in the background
+        as get_or_fetch would."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            age = time.monotonic() - entry[0]
+            if age >= self.ttl + self.stale_ttl:
+                return None
+            self._entries.move_to_end(key)
+            if age >= self.ttl and fetch is not None:
+                self._revalidate(key, fetch, cacheable)
+            return entry[1]
+
+    def put(self, key, value):
+        """Store a value fetched elsewhere, e.g. by a streaming search"""
+        with self._lock:
+            self._store(key, value, bool)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _revalidate(self, key, fetch, cacheable):
+        # Caller holds the lock; at most one refresh per key at a time
+        if key not in self._inflight:
+            refresh = self._inflight[key] = Future()
+            self._refresher.submit(self._fetch, key, fetch, refresh, cacheable)
+
+    def _fetch(self, key, fetch, future, cacheable):
+        try:
+            value = fetch()
+        except Exception as e:
+            print(f"Search fetch failed for {key}: {e}")
+            with self._lock:
+                self._inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._store(key, value, cacheable)
+            self._inflight.pop(key, None)
+        future.set_result(value)
+        return value
+
+    def _store(self, key, value, cacheable):
+        # Empty or partial results usually mean a site blocked us or timed out;
+        # don't pin that for a TTL
+        if cacheable(value):
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,263 @@
+# site_adapters.py
+
+from contextlib import contextmanager
+from datetime import datetime
+from urllib.parse import parse_qsl, urlencode, urlparse
+import re
+import threading
+from rate_limit import TokenBucket
+
+# fetcher (requests, bs4, Selenium pool) is imported on first fetch so the price
+# store can canonicalize URLs without pulling in the scraping stack.
+
+# How an adapter gets its page: "auto" tries plain HTTP and falls back to the
+# pooled browser, "http" never launches a browser, "browser" always renders.
+FETCH_STRATEGIES = {
+    "auto": "fetch_soup",
+    "http": "fetch_soup_http",
+    "browser": "fetch_soup_browser",
+}
+
+# Query parameters that only track how a visitor arrived; never part of a product's identity
+TRACKING_PARAMS = re.compile(
+    r'^(utm_\w+|ref\w*|pd_rd_\w+|pf_rd_\w+|content-id|_encoding|psc|th|sr|qid|keywords|dib\w*|'
+    r'sp_csd|spla|aaxitk|hsa_\w+|crid|sprefix|lid|marketplace|store|srno|otracker\w*|fm|iid|'
+    r'ppt|ppn|ssid|qh|cmpid|gclid|fbclid|affid|affextparam\d*)$',
+    re.IGNORECASE
+)
+
+# Politeness defaults per site: scrapes in flight at once, and sustained
+# requests per second (with bursts of RATE_BURST)
+CONCURRENCY = 2
+RATE = 1.0
+RATE_BURST = 2
+
+
+def parse_price(text):
+    """₹1,23,456.00 -> 123456.0"""
+    return float(re.sub(r'[^\d.]', '', text))
+
+
+def parse_rating(text):
+    return text
+
+
+def parse_first_word(text):
+    """Amazon's "4.3 out of 5 stars" -> "4.3" """
+    return text.split()[0]
+
+
+class SiteAdapter:
+    """Everything needed to scrape one retailer's product page, as data.
+
+    Selector fields are lists tried in order; the first match wins. `ready`
+    lists the selectors that must resolve before a page counts as loaded and
+    defaults to "any title selector" and "any price selector".
+
+    `concurrency` and `rate` cap scrapes against the site across the whole
+    process, whichever caller (batch, scheduler, web request) issues them.
+
+    `ids` maps a product URL to the site's own product ID: a list of
+    (regex with an `id` group, canonical URL template) pairs tried in order.
+    Templates may use {id}, {domain} (the registered domain) and {path}."""
+
+    def __init__(self, site, domains, title, price, brand=(), rating=(), ready=None,
+                 fetch="auto", price_parser=parse_price, rating_parser=parse_rating,
+                 concurrency=CONCURRENCY, rate=RATE, burst=RATE_BURST, ids=()):
+        if fetch not in FETCH_STRATEGIES:
+            raise ValueError(f"Unknown fetch strategy '{fetch}' for {site}")
+        self.site = site
+        self.domains = tuple(domains)
+        self.title = list(title)
+        self.price = list(price)
+        self.brand = list(brand)
+        self.rating = list(rating)
+        self.ready = list(ready) if ready is not None else [", ".join(self.title), ", ".join(self.price)]
+        self.fetch_strategy = fetch
+        self.price_parser = price_parser
+        self.rating_parser = rating_parser
+        self.concurrency = concurrency
+        self.ids = [(re.compile(pattern), template) for pattern, template in ids]
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._bucket = TokenBucket(rate, burst)
+
+    @contextmanager
+    def throttle(self, cancel=None):
+        """Hold one of the site's concurrency slots and spend a rate-limit token.
+
+        Yields False instead of waiting further once `cancel` (an Event) is set."""
+        with self._slots:
+            yield self._bucket.acquire(cancel)
+
+    def fetch(self, url):
+        import fetcher
+
+        fetch = getattr(fetcher, FETCH_STRATEGIES[self.fetch_strategy])
+        soup = fetch(url, self.ready, site=self.site)
+        if soup is None:
+            raise RuntimeError(f"{self.site} page did not load: {url}")
+        return soup
+
+    def parse(self, soup, url, threshold):
+        """Scraped row in the price store's column layout, or None when the page has
+        no price (a changed layout, or a browser render that timed out half loaded)"""
+        name = _select_first(soup, self.title)
+        price = _select_first(soup, self.price)
+        brand = _select_first(soup, self.brand)
+        rating = _select_first(soup, self.rating)
+
+        price = self.price_parser(price.text) if price else None
+        if not price or price <= 0:
+            print(f"{self.site}: no price found on {url}")
+            return None
+
+        return {
+            'site': self.site,
+            'name': name.get_text(strip=True) if name else 'N/A',
+            'price': price,
+            'brand': brand.get_text(strip=True) if brand else 'N/A',
+            'rating': self.rating_parser(rating.get_text(strip=True)) if rating else 'N/A',
+            'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            'url': url,
+            'threshold': threshold
+        }
+
+    def __repr__(self):
+        return f"SiteAdapter({self.site!r})"
+
+
+def _select_first(soup, selectors):
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element:
+            return element
+    return None
+
+
+# Selectors follow each site's current markup and will need updating as it changes.
+ADAPTERS = [
+    SiteAdapter(
+        'Amazon', ['amazon.in', 'amazon.com', 'amzn.in', 'amzn.to'],
+        title=['#productTitle'],
+        price=['span.a-price > span.a-offscreen'],
+        brand=['#bylineInfo'],
+        rating=['span.a-icon-alt'],
+        rating_parser=parse_first_word,
+        ids=[(r'/(?:dp|gp/product|gp/aw/d|product)/(?P<id>[A-Z0-9]{10})(?:[/?]|$)',
+              'https://www.{domain}/dp/{id}')],
+    ),
+    SiteAdapter(
+        'Flipkart', ['flipkart.com'],
+        title=['span.B_NuCI', 'span.VU-ZEz'],
+        price=['div._30jeq3._16Jk6d', 'div.Nx9bqj.CxhGGd'],
+        brand=['a._2whKao'],
+        rating=['div._3LWZlK', 'div.XQDdHH'],
+        ids=[(r'[?&]pid=(?P<id>[A-Z0-9]+)', 'https://www.{domain}{path}?pid={id}'),
+             (r'/p/(?P<id>itm[0-9a-z]+)', 'https://www.{domain}{path}')],
+    ),
+    SiteAdapter(
+        'Meesho', ['meesho.com'],
+        title=['h1.ProductDetails__title'],
+        price=['span.ProductDetails__price-value'],
+        brand=['div.ProductDetails__brand-name'],
+        rating=['div.Ratings__rating'],
+        ids=[(r'/p/(?P<id>[0-9a-z]+)', 'https://www.{domain}{path}')],
+    ),
+    SiteAdapter(
+        'Croma', ['croma.com'],
+        title=['h1.pdp-title'],
+        price=['span.amount'],
+        brand=['div.product-brand > a'],
+        rating=['span.bv_avgRating_component_container'],
+        ids=[(r'/p/(?P<id>\d+)', 'https://www.{domain}{path}')],
+    ),
+    SiteAdapter(
+        'Shopsy', ['shopsy.in'],
+        title=['span._2BULo'],
+        price=['div._30jeq3'],
+        brand=['span.G6XhRU'],
+        rating=['div._3LWZlK'],
+        ids=[(r'[?&]pid=(?P<id>[A-Z0-9]+)', 'https://www.{domain}{path}?pid={id}'),
+             (r'/p/(?P<id>itm[0-9a-z]+)', 'https://www.{domain}{path}')],
+    ),
+    SiteAdapter(
+        'Reliance Digital', ['reliancedigital.in'],
+        title=['h1.pdp__title'],
+        price=['span.pdp__offerPrice', 'span.pdp__price'],
+        brand=['div.pdp__brand-name'],
+        rating=['div.ReviewModule__reviewScore'],
+        ids=[(r'/p/(?P<id>\d+)', 'https://www.{domain}{path}')],
+    ),
+]
+
+_by_domain = {}
+_by_site = {}
+
+
+def register(adapter):
+    """Add (or replace) an adapter; adding a site needs nothing else"""
+    for domain in adapter.domains:
+        _by_domain[domain.lower()] = adapter
+    _by_site[adapter.site] = adapter
+    return adapter
+
+
+for _adapter in ADAPTERS:
+    register(_adapter)
+
+
+def adapter_for(url):
+    """Adapter whose domain matches the URL's host or one of its parents, or None"""
+    return _match(url)[0]
+
+
+def canonicalize(url):
+    """(product_key, canonical_url) for a product URL.
+
+    Known sites key on their own product ID ("amazon.in:B0DRL635G7",
+    "flipkart.com:MOBHD8ZJMRTQH6DD"), so every tracking-laden variant of a
+    link maps to one product. Anything else keys on host, path and the query
+    minus tracking parameters."""
+    adapter, domain, parsed = _match(url)
+    path = parsed.path.rstrip('/') or '/'
+    target = path + ('?' + parsed.query if parsed.query else '')
+
+    if adapter is not None:
+        for pattern, template in adapter.ids:
+            match = pattern.search(target)
+            if match:
+                product_id = match.group('id')
+                return (f"{domain}:{product_id}",
+                        template.format(id=product_id, domain=domain, path=path))
+
+    host = (parsed.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if not TRACKING_PARAMS.match(key)
+    ))
+    suffix = f"{path}?{query}" if query else path
+    return f"{host}{suffix}", f"{parsed.scheme or 'https'}://{parsed.netloc.lower()}{suffix}"
+
+
+def _match(url):
+    # (adapter, registered domain, parsed url); www.amazon.in -> amazon.in -> in
+    if '//' not in url:
+        url = '//' + url   # bare "www.amazon.in/dp/..." still has a host
+    parsed = urlparse(url.strip())
+    labels = (parsed.hostname or '').lower().split('.')
+    for i in range(len(labels) - 1):
+        domain = '.'.join(labels[i:])
+        adapter = _by_domain.get(domain)
+        if adapter:
+            return adapter, domain, parsed
+    return None, None, parsed
+
+
+def get_adapter(site):
+    return _by_site[site]
+
+
+def supported_sites():
+    return list(_by_site)
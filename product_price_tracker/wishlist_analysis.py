@@ -1,23 +1,154 @@
 # wishlist_analysis.py
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import json
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
+import re
+import threading
+import uuid
 
-def generate_wishlist_insights(csv_path="wishlist.csv"):
+# Rendered charts live under static/, one folder per user
+STATIC_DIR = 'static'
+CHART_DIR = 'charts'
+CHART_STYLE_VERSION = '1'   # bump to invalidate every cached chart after a style change
+CHARTS_KEPT_PER_USER = 2
+
+# Single worker: renders are serialised and never run on a request thread
+_render_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="wishlist-charts")
+_pending = {}   # (user_dir, digest) -> render Future
+_pending_lock = threading.Lock()
+
+# Intent thresholds: "high" needs enough visits *and* recent activity
+HIGH_INTENT_VISITS = 5
+HIGH_INTENT_RECENT_DAYS = 7
+MEDIUM_INTENT_VISITS = 3
+
+def classify_intent(df, high_visits=HIGH_INTENT_VISITS, recent_days=HIGH_INTENT_RECENT_DAYS,
+                    medium_visits=MEDIUM_INTENT_VISITS, now=None):
+    """Label every row high/medium/low in one columnar pass, keeping explicit intent_score values"""
+    now = pd.Timestamp.now() if now is None else now
+    visits = pd.to_numeric(df['times_visited'], errors='coerce').fillna(0)
+    recent = pd.to_datetime(df['last_activity'], errors='coerce') >= now - pd.Timedelta(days=recent_days)
+
+    computed = np.select(
+        [(visits >= high_visits) & recent, visits >= medium_visits],
+        ['high', 'medium'],
+        default='low'
+    )
+    return df['intent_score'].where(df['intent_score'].notna(), pd.Series(computed, index=df.index))
+
+def chart_digest(prices, intent_counts):
+    """Hash of exactly the data the two charts are drawn from"""
+    h = hashlib.sha1(CHART_STYLE_VERSION.encode())
+    h.update(pd.to_numeric(prices, errors='coerce').to_numpy(dtype=float).tobytes())
+    h.update(json.dumps({str(k): int(v) for k, v in intent_counts.items()}, sort_keys=True).encode())
+    return h.hexdigest()[:16]
+
+def ensure_charts(prices, intent_counts, user_id=None):
+    """Static paths of the histogram and pie for this data, rendering them if needed.
+
+    While a new render is in progress the user's previous charts are served;
+    only the very first render for a user is waited on. No data means no charts."""
+    if prices.empty:
+        return None, None
+
+    user_dir = os.path.join(CHART_DIR, re.sub(r'[^A-Za-z0-9_-]', '_', user_id or 'all'))
+    digest = chart_digest(prices, intent_counts)
+    hist_image = f"{user_dir}/hist_{digest}.png"
+    pie_image = f"{user_dir}/pie_{digest}.png"
+
+    if all(os.path.exists(os.path.join(STATIC_DIR, p)) for p in (hist_image, pie_image)):
+        return hist_image, pie_image
+
+    # Users with identical data still render into their own folders
+    key = (user_dir, digest)
+    with _pending_lock:
+        future = _pending.get(key)
+        if future is None:
+            future = _render_executor.submit(
+                _render_charts, prices.copy(), intent_counts.copy(),
+                os.path.join(STATIC_DIR, user_dir), digest
+            )
+            _pending[key] = future
+            future.add_done_callback(lambda _: _forget_pending(key))
+
+    previous = _latest_charts(user_dir)
+    if previous:
+        return previous
+
+    future.result()
+    return hist_image, pie_image
+
+def _forget_pending(key):
+    with _pending_lock:
+        _pending.pop(key, None)
+
+def _latest_charts(user_dir):
+    folder = os.path.join(STATIC_DIR, user_dir)
+    if not os.path.isdir(folder):
+        return None
+    hists = sorted((f for f in os.listdir(folder) if f.startswith('hist_') and f.endswith('.png')),
+                   key=lambda f: os.path.getmtime(os.path.join(folder, f)), reverse=True)
+    for hist in hists:
+        pie = 'pie_' + hist[len('hist_'):]
+        if os.path.exists(os.path.join(folder, pie)):
+            return f"{user_dir}/{hist}", f"{user_dir}/{pie}"
+    return None
+
+def _render_charts(prices, intent_counts, folder, digest):
+    # matplotlib is the slowest import in the app; only load it when a chart is drawn
+    from matplotlib.figure import Figure
+
+    os.makedirs(folder, exist_ok=True)
+
+    #  Save Histogram (Price Threshold)
+    fig = Figure(figsize=(6, 4))
+    ax = fig.subplots()
+    prices.plot(kind='hist', bins=10, color='skyblue', edgecolor='black', ax=ax)
+    ax.set_title("Price Threshold Histogram")
+    ax.set_xlabel("Threshold Price (₹)")
+    ax.set_ylabel("Count")
+    fig.tight_layout()
+    _save_atomic(fig, os.path.join(folder, f"hist_{digest}.png"))
+
+    # Save Pie Chart (Intent Score Distribution)
+    fig = Figure(figsize=(6, 6))
+    ax = fig.subplots()
+    if not intent_counts.empty:
+        intent_counts.plot(kind='pie', autopct='%1.1f%%', startangle=140, ax=ax)
+    ax.set_title("Intent Score Distribution")
+    ax.set_ylabel("")  # Remove y-label
+    fig.tight_layout()
+    _save_atomic(fig, os.path.join(folder, f"pie_{digest}.png"))
+
+    _prune_charts(folder)
+
+def _save_atomic(fig, path):
+    # Readers only ever see a complete file
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    fig.savefig(tmp_path, format='png')
+    os.replace(tmp_path, path)
+
+def _prune_charts(folder):
+    for prefix in ('hist_', 'pie_'):
+        charts = sorted((f for f in os.listdir(folder) if f.startswith(prefix) and f.endswith('.png')),
+                        key=lambda f: os.path.getmtime(os.path.join(folder, f)), reverse=True)
+        for old in charts[CHARTS_KEPT_PER_USER:]:
+            try:
+                os.remove(os.path.join(folder, old))
+            except OSError:
+                pass
+
+def generate_wishlist_insights(csv_path="wishlist.csv", user_id=None):
     df = pd.read_csv(csv_path)
+    if user_id:
+        # An unknown user_id just filters to nothing; it never gets a chart folder
+        df = df[df['user_id'].astype(str) == user_id].reset_index(drop=True)
 
     # Fill missing intent_score
-    def classify_intent(row):
-        if pd.notnull(row['intent_score']):
-            return row['intent_score']
-        if row['times_visited'] >= 5 and pd.to_datetime(row['last_activity']) >= pd.Timestamp.now() - pd.Timedelta(days=7):
-            return 'high'
-        elif row['times_visited'] >= 3:
-            return 'medium'
-        else:
-            return 'low'
-
-    df['intent_score'] = df.apply(classify_intent, axis=1)
+    df['intent_score'] = classify_intent(df)
 
     # Group by category
     category_group = df.groupby('category').agg({
@@ -28,29 +159,15 @@ def generate_wishlist_insights(csv_path="wishlist.csv"):
         'user_id': 'user_count'
     })
 
-    #  Save Histogram (Price Threshold)
-    plt.figure(figsize=(6, 4))
-    df['price_threshold'].plot(kind='hist', bins=10, color='skyblue', edgecolor='black')
-    plt.title("Price Threshold Histogram")
-    plt.xlabel("Threshold Price (₹)")
-    plt.ylabel("Count")
-    plt.tight_layout()
-    plt.savefig("static/hist_price.png")
-    plt.close()
-
-    # Save Pie Chart (Intent Score Distribution)
+    # Charts are content-addressed, so unchanged data never re-renders them
     intent_counts = df['intent_score'].value_counts()
-    plt.figure(figsize=(6, 6))
-    intent_counts.plot(kind='pie', autopct='%1.1f%%', startangle=140)
-    plt.title("Intent Score Distribution")
-    plt.ylabel("")  # Remove y-label
-    plt.tight_layout()
-    plt.savefig("static/intent_pie.png")
-    plt.close()
+    hist_image, pie_image = ensure_charts(df['price_threshold'], intent_counts, user_id)
 
     return {
         "category_group": category_group.to_dict(orient="records"),
         "price_hist": df['price_threshold'].tolist(),
         "intent_counts": intent_counts.to_dict(),
+        "hist_image": hist_image,
+        "pie_image": pie_image,
         "raw_df": df
     }